@@ -3,14 +3,53 @@ Authentication API endpoints.
 
 Handles Google OAuth login and domain validation.
 """
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+import requests
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from google.auth import jwt
+from google.auth.transport import requests as google_requests
 from app.core.config import settings
 
 router = APIRouter()
 
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_CERTS_TTL_SECONDS = 300
+MIN_CERTS_REFRESH_SECONDS = 30
+TOKEN_CACHE_SIZE = 1024
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+_CLIENT_ID = settings.GOOGLE_CLIENT_ID
+_AUTH_ENABLED = settings.AUTH_ENABLED
+_ALLOWED_USERS = frozenset(settings.ALLOWED_USERS)
+
+# Transport and signing-cert cache shared across logins so verification is a
+# local signature check instead of an HTTPS round-trip per request.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.1)),
+)
+_REQUEST = google_requests.Request(session=_SESSION)
+_certs_cache: Dict[str, Any] = {"certs": None, "expires_at": 0.0, "fetched_at": 0.0, "etag": None}
+_certs_lock = threading.Lock()
+
+# Recently verified tokens (keyed by digest) so repeated logins with the same
+# still-valid ID token skip signature verification.
+_token_cache: "OrderedDict[bytes, Mapping[str, Any]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 
 class TokenRequest(BaseModel):
     """Request body for login endpoint."""
@@ -32,6 +71,87 @@ class AuthConfig(BaseModel):
     workspace_name: str
 
 
+def _refresh_certs() -> None:
+    """Fetch Google's signing certs, honoring ETag and Cache-Control max-age."""
+    headers = {}
+    if _certs_cache["etag"] and _certs_cache["certs"]:
+        headers["If-None-Match"] = _certs_cache["etag"]
+
+    try:
+        response = _REQUEST(GOOGLE_CERTS_URL, method="GET", headers=headers)
+    except Exception:
+        if _certs_cache["certs"]:
+            # Serve stale certs while Google is unreachable
+            return
+        raise
+
+    _certs_cache["fetched_at"] = time.monotonic()
+    if response.status == 200:
+        _certs_cache["certs"] = json.loads(response.data.decode("utf-8"))
+        _certs_cache["etag"] = response.headers.get("ETag")
+    elif response.status != 304:
+        if _certs_cache["certs"]:
+            return
+        raise ValueError(f"Could not fetch Google certificates (HTTP {response.status})")
+
+    match = _MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+    ttl = int(match.group(1)) if match else DEFAULT_CERTS_TTL_SECONDS
+    _certs_cache["expires_at"] = time.monotonic() + ttl
+
+
+def _get_certs(kid: Optional[str]) -> Mapping[str, str]:
+    """Return cached signing certs, refreshing once if expired or the key id is unknown."""
+    certs = _certs_cache["certs"]
+    if certs and time.monotonic() < _certs_cache["expires_at"] and (kid is None or kid in certs):
+        return certs
+
+    with _certs_lock:
+        # Another caller may have refreshed while we waited on the lock
+        certs = _certs_cache["certs"]
+        now = time.monotonic()
+        expired = not certs or now >= _certs_cache["expires_at"]
+        # Unknown key ids force a refresh (key rotation), but not more than
+        # once per MIN_CERTS_REFRESH_SECONDS so bogus tokens can't hammer Google
+        rotated = certs is not None and bool(kid) and kid not in certs and now - _certs_cache["fetched_at"] >= MIN_CERTS_REFRESH_SECONDS
+        if expired or rotated:
+            _refresh_certs()
+        return _certs_cache["certs"]
+
+
+def _verify(token: str) -> Mapping[str, Any]:
+    """Verify a Google ID token locally against the cached signing certs."""
+    kid = jwt.decode_header(token).get("kid")
+    id_info = jwt.decode(token, certs=_get_certs(kid), audience=_CLIENT_ID)
+    if id_info.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {id_info.get('iss')}")
+    return id_info
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def _get_cached_token(key: bytes) -> Optional[Mapping[str, Any]]:
+    """Return previously verified claims for a token that has not expired yet."""
+    with _token_cache_lock:
+        id_info = _token_cache.get(key)
+        if id_info is None:
+            return None
+        if time.time() >= id_info.get("exp", 0):
+            del _token_cache[key]
+            return None
+        _token_cache.move_to_end(key)
+        return id_info
+
+
+def _cache_token(key: bytes, id_info: Mapping[str, Any]) -> None:
+    with _token_cache_lock:
+        _token_cache[key] = id_info
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
 @router.get("/config", response_model=AuthConfig)
 async def get_auth_config():
     """
@@ -41,7 +161,7 @@ async def get_auth_config():
     or go directly to the gallery.
     """
     return AuthConfig(
-        auth_enabled=settings.AUTH_ENABLED,
+        auth_enabled=_AUTH_ENABLED,
         dev_mode=settings.DEV_MODE,
         google_client_id=settings.GOOGLE_CLIENT_ID,
         workspace_name=settings.WORKSPACE_NAME,
@@ -57,7 +177,7 @@ async def login(request: TokenRequest):
     """
     # If auth is disabled, this endpoint shouldn't normally be called,
     # but handle gracefully just in case
-    if not settings.AUTH_ENABLED:
+    if not _AUTH_ENABLED:
         return UserSession(
             email="guest@local",
             name="Guest User",
@@ -65,19 +185,19 @@ async def login(request: TokenRequest):
         )
     
     try:
-        # Verify the token with Google
-        id_info = id_token.verify_oauth2_token(
-            request.token,
-            requests.Request(),
-            settings.GOOGLE_CLIENT_ID
-        )
+        # Verify the token against Google's (cached) signing certs off the event loop
+        token_key = _token_key(request.token)
+        id_info = _get_cached_token(token_key)
+        if id_info is None:
+            id_info = await asyncio.to_thread(_verify, request.token)
+            _cache_token(token_key, id_info)
 
         email = id_info.get("email", "")
         hd = id_info.get("hd", "")  # Hosted Domain (for Google Workspace accounts)
 
         # Validate allowed users
-        if settings.ALLOWED_USERS:
-            if email.lower() not in settings.ALLOWED_USERS:
+        if _ALLOWED_USERS:
+            if email.lower() not in _ALLOWED_USERS:
                 raise HTTPException(
                     status_code=403,
                     detail="Access denied. Your email is not in the allowed users list."
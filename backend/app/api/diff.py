@@ -2,6 +2,8 @@
 Diff API Routes (Native)
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
@@ -17,7 +19,8 @@ class DiffRequest(BaseModel):
 async def start_diff(project_id: str, request: DiffRequest):
     """Start a visual diff job."""
     try:
-        job_id = diff_service.start_diff_job(project_id, request.commit1, request.commit2)
+        # Pruning the diff cache and probing it touch the filesystem; keep that off the event loop
+        job_id = await asyncio.to_thread(diff_service.start_diff_job, project_id, request.commit1, request.commit2)
         return {"job_id": job_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -30,8 +33,17 @@ async def get_status(project_id: str, job_id: str):
     return status
 
 @router.get("/{project_id}/diff/{job_id}/manifest")
-async def get_manifest(project_id: str, job_id: str):
-    manifest = diff_service.get_manifest(job_id)
+async def get_manifest(project_id: str, job_id: str, include_unchanged: bool = True):
+    """Diff manifest; pass include_unchanged=false to drop unchanged BoM rows from the payload."""
+    if include_unchanged:
+        # manifest.json is already JSON; send the bytes instead of parsing and re-encoding
+        path = diff_service.get_manifest_path(job_id)
+        if not path:
+            raise HTTPException(status_code=404, detail="Manifest not found or job not complete")
+        return FileResponse(path, media_type="application/json")
+
+    # Parsing and filtering a large manifest is CPU work; keep it off the event loop
+    manifest = await asyncio.to_thread(diff_service.get_manifest, job_id, include_unchanged)
     if not manifest:
         raise HTTPException(status_code=404, detail="Manifest not found or job not complete")
     return manifest
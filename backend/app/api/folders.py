@@ -1,37 +1,93 @@
+import hashlib
+import os
+import time
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, TypeAdapter
 
 from app.services import folder_service, project_service
 
 router = APIRouter()
 
+TREE_CACHE_TTL = 10.0  # seconds
+
+_tree_adapter = TypeAdapter(List[folder_service.FolderTreeItem])
+# Serialized /tree response: {"stamp", "etag", "body", "expires_at"}
+_tree_cache: Dict[str, Any] = {}
+
 
 class FolderContentsResponse(BaseModel):
     folders: List[folder_service.Folder]
     projects: List[project_service.Project]
 
 
+class MessageResponse(BaseModel):
+    message: str
+
+
 class CreateFolderRequest(BaseModel):
     name: str
     parent_id: Optional[str] = None
 
 
+class UpdateFolderRequest(BaseModel):
+    name: Optional[str] = None
+    parent_id: Optional[str] = None
+
+    class Config:
+        extra = "forbid"
+
+
 class MoveProjectRequest(BaseModel):
     folder_id: Optional[str] = None
 
 
+def _file_stamp(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _tree_stamp() -> tuple:
+    """Modification stamps of the files the folder tree is built from."""
+    return (
+        _file_stamp(folder_service.FOLDERS_FILE),
+        _file_stamp(project_service.PROJECT_REGISTRY_FILE),
+    )
+
+
+def _invalidate_tree_cache() -> None:
+    _tree_cache.clear()
+
+
 @router.get("/tree", response_model=List[folder_service.FolderTreeItem])
-async def get_folder_tree():
-    return folder_service.get_folder_tree()
+async def get_folder_tree(request: Request):
+    stamp = _tree_stamp()
+    if (
+        _tree_cache.get("stamp") != stamp
+        or time.monotonic() >= _tree_cache.get("expires_at", 0)
+    ):
+        body = _tree_adapter.dump_json(folder_service.get_folder_tree())
+        _tree_cache.update(
+            stamp=stamp,
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            body=body,
+            expires_at=time.monotonic() + TREE_CACHE_TTL,
+        )
+
+    headers = {"ETag": _tree_cache["etag"], "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == _tree_cache["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=_tree_cache["body"], media_type="application/json", headers=headers)
 
 
 @router.get("/contents", response_model=FolderContentsResponse)
 async def get_folder_contents(folder_id: Optional[str] = Query(default=None)):
     try:
         payload = folder_service.get_folder_contents(folder_id)
-        return FolderContentsResponse(**payload)
+        return FolderContentsResponse.model_construct(**payload)
     except ValueError as error:
         raise HTTPException(status_code=404, detail=str(error))
 
@@ -39,27 +95,33 @@ async def get_folder_contents(folder_id: Optional[str] = Query(default=None)):
 @router.post("/", response_model=folder_service.Folder)
 async def create_folder(request: CreateFolderRequest):
     try:
-        return folder_service.create_folder(name=request.name, parent_id=request.parent_id)
+        folder = folder_service.create_folder(name=request.name, parent_id=request.parent_id)
     except ValueError as error:
         raise HTTPException(status_code=400, detail=str(error))
+    _invalidate_tree_cache()
+    return folder
 
 
 @router.patch("/{folder_id}", response_model=folder_service.Folder)
-async def update_folder(folder_id: str, request: Dict[str, Any]):
-    if "name" not in request and "parent_id" not in request:
+async def update_folder(folder_id: str, request: UpdateFolderRequest):
+    # fields_set distinguishes an omitted parent_id from an explicit null (move to root)
+    provided = request.model_fields_set
+    if not provided:
         raise HTTPException(status_code=400, detail="No update fields provided")
 
-    name = request.get("name")
-    parent_id = request["parent_id"] if "parent_id" in request else folder_service.UNSET
+    name = request.name
+    parent_id = request.parent_id if "parent_id" in provided else folder_service.UNSET
 
     try:
-        return folder_service.update_folder(folder_id=folder_id, name=name, parent_id=parent_id)
+        folder = folder_service.update_folder(folder_id=folder_id, name=name, parent_id=parent_id)
     except ValueError as error:
         status_code = 404 if "not found" in str(error).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(error))
+    _invalidate_tree_cache()
+    return folder
 
 
-@router.delete("/{folder_id}")
+@router.delete("/{folder_id}", response_model=MessageResponse)
 async def delete_folder(folder_id: str, cascade: bool = Query(default=True)):
     try:
         deleted = folder_service.delete_folder(folder_id=folder_id, cascade=cascade)
@@ -68,16 +130,18 @@ async def delete_folder(folder_id: str, cascade: bool = Query(default=True)):
 
     if not deleted:
         raise HTTPException(status_code=404, detail="Folder not found")
+    _invalidate_tree_cache()
 
-    return {"message": "Folder deleted successfully"}
+    return MessageResponse(message="Folder deleted successfully")
 
 
-@router.post("/projects/{project_id}/move")
+@router.post("/projects/{project_id}/move", response_model=MessageResponse)
 async def move_project_to_folder(project_id: str, request: MoveProjectRequest):
     try:
         folder_service.move_project_to_folder(project_id=project_id, folder_id=request.folder_id)
     except ValueError as error:
         status_code = 404 if "not found" in str(error).lower() else 400
         raise HTTPException(status_code=status_code, detail=str(error))
+    _invalidate_tree_cache()
 
-    return {"message": "Project moved successfully"}
+    return MessageResponse(message="Project moved successfully")
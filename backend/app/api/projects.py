@@ -1,16 +1,21 @@
+import asyncio
 import os
-from fastapi import APIRouter, HTTPException, Query, Request
+import stat
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.services import project_service, file_service, path_config_service
-from app.services.git_service import (get_releases, get_commits_list, get_file_from_commit, file_exists_in_commit, get_releases_filtered, get_commits_list_filtered, get_file_from_commit_with_prefix)
+from app.services.git_service import (get_releases, get_commits_list, get_file_from_commit, file_exists_in_commit, get_releases_filtered, get_commits_list_filtered, get_file_from_commit_with_prefix, get_head_commit_date)
 from app.services.path_config_service import PathConfig
 from app.services.comments_url_service import build_comments_source_urls, resolve_comments_base_url
 
 router = APIRouter()
 
 from pydantic import BaseModel
-from typing import Dict, List, Optional
 
 class Monorepo(BaseModel):
     name: str
@@ -19,6 +24,160 @@ class Monorepo(BaseModel):
     last_synced: Optional[str] = None
     repo_url: Optional[str] = None
 
+class ProjectCommit(BaseModel):
+    hash: str
+    full_hash: str
+    author: str
+    email: str
+    date: str
+    message: str
+
+class CommitsResponse(BaseModel):
+    commits: List[ProjectCommit]
+
+class ProjectRelease(BaseModel):
+    tag: str
+    commit_hash: str
+    date: str
+    message: str
+    # Type-2 only; omitted for whole-repo projects
+    subproject_files_changed: Optional[int] = None
+
+class ReleasesResponse(BaseModel):
+    releases: List[ProjectRelease]
+
+MONOREPO_CACHE_TTL = 60.0  # seconds
+
+# Folders hidden from the monorepo browser
+ARCHIVE_DIRECTORIES = frozenset({'archive', 'archived', 'old', 'backup', 'backups', 'obsolete'})
+
+# Per-monorepo metadata: {repo_name: (stamp, expires_at, Monorepo)}
+_monorepo_cache: Dict[str, tuple] = {}
+
+# Bounded pool for per-monorepo git reads so many repos don't oversubscribe file descriptors
+_monorepo_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="monorepo")
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _monorepo_stamp(repo_path: str, registry_mtime: Optional[int]) -> tuple:
+    """HEAD, HEAD reflog and registry mtimes; commits, pulls and imports change one of them."""
+    git_dir = os.path.join(repo_path, '.git')
+    return (
+        _mtime_ns(os.path.join(git_dir, 'HEAD')),
+        _mtime_ns(os.path.join(git_dir, 'logs', 'HEAD')),
+        registry_mtime,
+    )
+
+
+def invalidate_monorepo_cache() -> None:
+    _monorepo_cache.clear()
+
+
+def _last_synced(repo_path: str) -> Optional[str]:
+    """Get last synced time from git; runs on the monorepo executor."""
+    if not os.path.exists(os.path.join(repo_path, '.git')):
+        return None
+    return get_head_commit_date(repo_path)
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+TEXT_CACHE_SIZE = 64
+TEXT_CACHE_MAX_BYTES = 512 * 1024  # Only README/doc-sized files are kept
+
+# path -> ((mtime_ns, size), content), least recently used first
+_text_cache: "OrderedDict[str, Tuple[tuple, str]]" = OrderedDict()
+
+
+def _stat_and_read_text(path: str, cached_stamp: Optional[tuple]) -> Tuple[tuple, Optional[str]]:
+    """Stat path and read it unless it still matches cached_stamp (content is then None)."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp == cached_stamp:
+        return stamp, None
+    return stamp, _read_text(path)
+
+
+async def _read_text_cached(path: str) -> str:
+    """Read a small text file, reusing the decoded content while (mtime, size) is unchanged."""
+    cached = _text_cache.get(path)
+    # Stat and read both block, so they share one trip to a worker thread
+    stamp, content = await asyncio.to_thread(_stat_and_read_text, path, cached[0] if cached is not None else None)
+    if content is None:
+        if path in _text_cache:  # may have been evicted while we were in the thread
+            _text_cache.move_to_end(path)
+        return cached[1]
+
+    if stamp[1] <= TEXT_CACHE_MAX_BYTES:
+        _text_cache[path] = (stamp, content)
+        _text_cache.move_to_end(path)
+        while len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    return content
+
+
+def _stat_file(path: str, not_found_detail: str, is_dir_detail: str) -> os.stat_result:
+    """Stat a file to serve, once; FileResponse reuses the result instead of re-stat'ing."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    if stat.S_ISDIR(stat_result.st_mode):
+        raise HTTPException(status_code=400, detail=is_dir_detail)
+    return stat_result
+
+
+def _file_response(request: Request, path: str, stat_result: Optional[os.stat_result] = None) -> Response:
+    """
+    Serve a project file with an ETag derived from (mtime, size), answering
+    a matching If-None-Match with 304 instead of re-sending the file.
+    Files live in the working tree and change on sync, so clients must
+    revalidate (no-cache) rather than cache blindly.
+    """
+    if stat_result is None:
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {
+        "ETag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+        "Cache-Control": "public, no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, stat_result=stat_result, headers=headers)
+
+
+@lru_cache(maxsize=256)
+def _real_base(base: str) -> Tuple[str, str]:
+    """realpath of a serving root and its child prefix; roots are few and stable, so memoize."""
+    real = os.path.realpath(base)
+    return real, real if real.endswith(os.sep) else real + os.sep
+
+
+def _resolve_within(base: str, relative_path: str) -> Optional[str]:
+    """
+    Join relative_path onto base and return the normalized result, or None if
+    it escapes base (directory traversal). Symlinks are resolved before the
+    containment check, so a link inside a repository can't point outside it.
+    """
+    real_base, prefix = _real_base(base)
+    candidate = os.path.normpath(os.path.join(real_base, relative_path))
+    real_candidate = os.path.realpath(candidate)
+    if real_candidate == real_base or real_candidate.startswith(prefix):
+        return candidate
+    return None
+
 @router.get("/", response_model=List[project_service.Project])
 async def list_projects():
     """Return all registered projects (both Type-1 and Type-2)."""
@@ -32,42 +191,54 @@ async def list_monorepos():
     monorepos = []
     
     if os.path.exists(project_service.MONOREPOS_ROOT):
-        for repo_name in os.listdir(project_service.MONOREPOS_ROOT):
-            repo_path = os.path.join(project_service.MONOREPOS_ROOT, repo_name)
-            if not os.path.isdir(repo_path) or repo_name.startswith('.'):
-                continue
-            
-            # Count projects in this monorepo
-            all_projects = project_service.get_registered_projects()
-            repo_projects = [p for p in all_projects if p.parent_repo == repo_name]
-            
-            # Get last synced time from git
-            last_synced = None
-            git_dir = os.path.join(repo_path, '.git')
-            if os.path.exists(git_dir):
-                try:
-                    import subprocess
-                    result = subprocess.run(
-                        ['git', '-C', repo_path, 'log', '-1', '--format=%ci'],
-                        capture_output=True, text=True
-                    )
-                    if result.returncode == 0:
-                        last_synced = result.stdout.strip()
-                except:
-                    pass
-            
-            # Get repo URL from first project
-            repo_url = None
-            if repo_projects:
-                repo_url = repo_projects[0].repo_url
-            
-            monorepos.append(Monorepo(
-                name=repo_name,
-                path=repo_path,
-                project_count=len(repo_projects),
-                last_synced=last_synced,
-                repo_url=repo_url
+        with os.scandir(project_service.MONOREPOS_ROOT) as entries:
+            repo_entries = [entry for entry in entries if entry.is_dir() and not entry.name.startswith('.')]
+
+        registry_mtime = _mtime_ns(project_service.PROJECT_REGISTRY_FILE)
+        now = time.monotonic()
+
+        stale = []
+        for index, entry in enumerate(repo_entries):
+            stamp = _monorepo_stamp(entry.path, registry_mtime)
+            cached = _monorepo_cache.get(entry.name)
+            if cached and cached[0] == stamp and now < cached[1]:
+                monorepos.append(cached[2])
+            else:
+                monorepos.append(None)
+                stale.append((index, entry, stamp))
+
+        if stale:
+            # Group registered projects by parent repo once, not per monorepo
+            projects_by_repo: Dict[str, List[project_service.Project]] = {}
+            for project in project_service.get_registered_projects():
+                if project.parent_repo:
+                    projects_by_repo.setdefault(project.parent_repo, []).append(project)
+
+            # Read last synced time from git for every stale repo concurrently
+            loop = asyncio.get_running_loop()
+            dates = await asyncio.gather(*(
+                loop.run_in_executor(_monorepo_executor, _last_synced, entry.path)
+                for _, entry, _ in stale
             ))
+
+            for (index, entry, stamp), last_synced in zip(stale, dates):
+                # Count projects in this monorepo
+                repo_projects = projects_by_repo.get(entry.name, [])
+                
+                # Get repo URL from first project
+                repo_url = None
+                if repo_projects:
+                    repo_url = repo_projects[0].repo_url
+                
+                monorepo = Monorepo(
+                    name=entry.name,
+                    path=entry.path,
+                    project_count=len(repo_projects),
+                    last_synced=last_synced,
+                    repo_url=repo_url
+                )
+                _monorepo_cache[entry.name] = (stamp, now + MONOREPO_CACHE_TTL, monorepo)
+                monorepos[index] = monorepo
     
     return monorepos
 
@@ -86,7 +257,7 @@ async def get_monorepo_structure(repo_name: str, subpath: str = ""):
         raise HTTPException(status_code=404, detail="Path not found")
     
     # Security: ensure path is within repo
-    if not os.path.abspath(current_path).startswith(os.path.abspath(repo_path)):
+    if _resolve_within(repo_path, subpath) is None:
         raise HTTPException(status_code=400, detail="Invalid path")
     
     folders = []
@@ -95,46 +266,54 @@ async def get_monorepo_structure(repo_name: str, subpath: str = ""):
     all_registered = project_service.get_registered_projects()
     repo_projects = {p.sub_path: p for p in all_registered if p.parent_repo == repo_name}
     
-    for item in os.listdir(current_path):
-        item_path = os.path.join(current_path, item)
-        relative_path = os.path.relpath(item_path, repo_path)
-        
-        if os.path.isdir(item_path):
-            # Skip hidden directories and archive folders
-            if item.startswith('.') or item.lower() in ['archive', 'archived', 'old', 'backup', 'backups', 'obsolete']:
-                continue
-            
-            # Count items in folder (for display)
-            try:
-                item_count = len(os.listdir(item_path))
-            except:
-                item_count = 0
-            
-            folders.append({
-                "name": item,
-                "path": relative_path,
-                "item_count": item_count
+    # Children's repo-relative paths share this prefix; normalize it once
+    # rather than calling relpath per entry.
+    current_prefix = os.path.relpath(current_path, repo_path)
+    
+    with os.scandir(current_path) as entries:
+        dir_entries = [entry for entry in entries if entry.is_dir()]
+
+    for entry in dir_entries:
+        item = entry.name
+        item_path = entry.path
+        relative_path = item if current_prefix == os.curdir else os.path.join(current_prefix, item)
+
+        # Skip hidden directories and archive folders
+        if item.startswith('.') or item.lower() in ARCHIVE_DIRECTORIES:
+            continue
+
+        # One pass over the folder both counts items and detects a .kicad_pro file
+        item_count = 0
+        has_kicad_pro = False
+        try:
+            with os.scandir(item_path) as children:
+                for child in children:
+                    item_count += 1
+                    if not has_kicad_pro and child.name.endswith('.kicad_pro') and child.is_file():
+                        has_kicad_pro = True
+        except OSError:
+            item_count = 0
+
+        folders.append({
+            "name": item,
+            "path": relative_path,
+            "item_count": item_count
+        })
+
+        if not has_kicad_pro:
+            continue
+
+        # This is a KiCAD project
+        project = repo_projects.get(relative_path)
+        if project:
+            projects.append({
+                "id": project.id,
+                "name": project.name,
+                "display_name": project.display_name,
+                "relative_path": relative_path,
+                "has_thumbnail": project.has_thumbnail,
+                "last_modified": project.last_modified
             })
-        
-        # Check if this directory contains a .kicad_pro file
-        if os.path.isdir(item_path):
-            pro_files = [f for f in os.listdir(item_path) if f.endswith('.kicad_pro')]
-            if pro_files:
-                # This is a KiCAD project
-                project = repo_projects.get(relative_path)
-                if project:
-                    # Get custom display name for this project
-                    full_project_path = os.path.join(current_path, item)
-                    custom_display_name = path_config_service.get_project_display_name(full_project_path)
-                    
-                    projects.append({
-                        "id": project.id,
-                        "name": project.name,
-                        "display_name": custom_display_name,
-                        "relative_path": relative_path,
-                        "has_thumbnail": project_service.get_project_thumbnail_path(project.id) is not None,
-                        "last_modified": project.last_modified
-                    })
     
     return {
         "repo_name": repo_name,
@@ -143,6 +322,24 @@ async def get_monorepo_structure(repo_name: str, subpath: str = ""):
         "projects": projects
     }
 
+# Lowercased (project, name, description, parent_repo) rows, rebuilt only when
+# the cached project list is replaced. Stored as (source, rows).
+_search_index: tuple = (None, [])
+
+
+def _get_search_index() -> List[tuple]:
+    global _search_index
+
+    projects = project_service.get_registered_projects()
+    source, rows = _search_index
+    if source is not projects:
+        rows = [
+            (project, project.name.lower(), project.description.lower(), (project.parent_repo or "").lower())
+            for project in projects
+        ]
+        _search_index = (projects, rows)
+    return rows
+
 @router.get("/search")
 async def search_projects(q: str = ""):
     """
@@ -153,13 +350,10 @@ async def search_projects(q: str = ""):
         return {"results": []}
     
     query = q.lower()
-    all_projects = project_service.get_registered_projects()
     
     results = []
-    for project in all_projects:
-        if (query in project.name.lower() or 
-            query in project.description.lower() or
-            (project.parent_repo and query in project.parent_repo.lower())):
+    for project, name, description, parent_repo in _get_search_index():
+        if query in name or query in description or query in parent_repo:
             results.append({
                 "id": project.id,
                 "name": project.name,
@@ -208,6 +402,7 @@ async def import_project(request: ImportRequest):
             import_type=request.import_type,
             selected_paths=request.selected_paths
         )
+        invalidate_monorepo_cache()
         return {"job_id": job_id, "status": "started"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -231,7 +426,8 @@ async def sync_project_endpoint(project_id: str):
     Type-1: pulls the project repo.
     Type-2: pulls the parent repo.
     """
-    result = project_import_service.sync_project(project_id)
+    result = await asyncio.to_thread(project_import_service.sync_project, project_id)
+    invalidate_monorepo_cache()
     
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
@@ -260,11 +456,11 @@ async def trigger_workflow(project_id: str, request: WorkflowRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{project_id}/thumbnail")
-async def get_project_thumbnail(project_id: str):
+async def get_project_thumbnail(project_id: str, request: Request):
     path = project_service.get_project_thumbnail_path(project_id)
     if not path:
         raise HTTPException(status_code=404, detail="Thumbnail not found")
-    return FileResponse(path)
+    return _file_response(request, path)
 
 @router.get("/{project_id}", response_model=project_service.Project)
 async def get_project_detail(project_id: str):
@@ -363,20 +559,20 @@ async def download_file(project_id: str, path: str, type: str = "design", inline
     if not output_dir:
         raise HTTPException(status_code=404, detail=f"{type} outputs folder not configured")
     
-    file_path = os.path.join(output_dir, path)
-    
     # Security: prevent directory traversal
-    if not os.path.abspath(file_path).startswith(os.path.abspath(output_dir)):
+    file_path = _resolve_within(output_dir, path)
+    if file_path is None:
         raise HTTPException(status_code=400, detail="Invalid file path")
     
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    if os.path.isdir(file_path):
-        raise HTTPException(status_code=400, detail="Cannot download directory")
+    stat_result = _stat_file(file_path, "File not found", "Cannot download directory")
     
     disposition = "inline" if inline else "attachment"
-    return FileResponse(file_path, filename=os.path.basename(file_path), content_disposition_type=disposition)
+    return FileResponse(
+        file_path,
+        filename=os.path.basename(file_path),
+        content_disposition_type=disposition,
+        stat_result=stat_result,
+    )
 
 @router.get("/{project_id}/readme")
 async def get_project_readme(project_id: str, commit: str = None):
@@ -399,29 +595,28 @@ async def get_project_readme(project_id: str, commit: str = None):
             # For Type-2 projects, use parent repo path with relative prefix
             if project.import_type == "type2_subproject":
                 repo_path = project.parent_repo_path or os.path.dirname(project.path)
-                content = get_file_from_commit_with_prefix(repo_path, commit, readme_filename, project.sub_path)
+                content = await asyncio.to_thread(get_file_from_commit_with_prefix, repo_path, commit, readme_filename, project.sub_path)
             else:
-                content = get_file_from_commit(project.path, commit, readme_filename)
+                content = await asyncio.to_thread(get_file_from_commit, project.path, commit, readme_filename)
             return {"content": content}
         except HTTPException:
             raise
     
     # Otherwise read from filesystem
-    resolved = path_config_service.resolve_paths(project.path)
+    resolved = path_config_service.resolve_paths(project.path, config)
     readme_path = resolved.readme_path
     
     if not readme_path or not os.path.exists(readme_path):
         raise HTTPException(status_code=404, detail="README not found")
     
     try:
-        with open(readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = await _read_text_cached(readme_path)
         return {"content": content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading README: {str(e)}")
 
 @router.get("/{project_id}/asset/{asset_path:path}")
-async def get_project_asset(project_id: str, asset_path: str):
+async def get_project_asset(project_id: str, asset_path: str, request: Request):
     """
     Serve assets (images, etc.) from project directory.
     Typically used for README image references.
@@ -431,19 +626,14 @@ async def get_project_asset(project_id: str, asset_path: str):
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Resolve asset path (typically relative to project root)
-    file_path = os.path.join(project.path, asset_path)
-    
     # Security: prevent directory traversal
-    if not os.path.abspath(file_path).startswith(os.path.abspath(project.path)):
+    file_path = _resolve_within(project.path, asset_path)
+    if file_path is None:
         raise HTTPException(status_code=400, detail="Invalid asset path")
     
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
-    if os.path.isdir(file_path):
-        raise HTTPException(status_code=400, detail="Cannot serve directory")
+    stat_result = _stat_file(file_path, "Asset not found", "Cannot serve directory")
     
-    return FileResponse(file_path)
+    return _file_response(request, file_path, stat_result)
 
 @router.get("/{project_id}/docs")
 async def get_docs_files(project_id: str):
@@ -486,37 +676,37 @@ async def get_doc_file_content(project_id: str, path: str, commit: str = None):
                 repo_path = project.parent_repo_path or os.path.dirname(project.path)
                 # Prepend relative_path to the docs path
                 relative_prefix = f"{project.sub_path}/{docs_path}" if project.sub_path else docs_path
-                content = get_file_from_commit_with_prefix(repo_path, commit, path, relative_prefix)
+                content = await asyncio.to_thread(get_file_from_commit_with_prefix, repo_path, commit, path, relative_prefix)
             else:
-                content = get_file_from_commit(project.path, commit, file_path)
+                content = await asyncio.to_thread(get_file_from_commit, project.path, commit, file_path)
             return {"content": content, "path": path}
         except HTTPException:
             raise
     
     # Otherwise read from filesystem
-    resolved = path_config_service.resolve_paths(project.path)
+    resolved = path_config_service.resolve_paths(project.path, config)
     docs_dir = resolved.documentation_dir
     
     if not docs_dir or not os.path.exists(docs_dir):
         raise HTTPException(status_code=404, detail="Documentation folder not found")
     
-    file_path = os.path.join(docs_dir, path)
-    
     # Security: prevent directory traversal
-    if not os.path.abspath(file_path).startswith(os.path.abspath(docs_dir)):
+    file_path = _resolve_within(docs_dir, path)
+    if file_path is None:
         raise HTTPException(status_code=400, detail="Invalid file path")
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = await _read_text_cached(file_path)
         return {"content": content, "path": path}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
 
-@router.get("/{project_id}/releases")
+# Declared response models let FastAPI serialize these lists straight to JSON
+# with pydantic instead of walking every dict through jsonable_encoder.
+@router.get("/{project_id}/releases", response_model=ReleasesResponse, response_model_exclude_unset=True)
 async def get_project_releases(project_id: str):
     """
     Get list of Git releases/tags for a project.
@@ -530,13 +720,13 @@ async def get_project_releases(project_id: str):
     if project.import_type == "type2_subproject":
         repo_path = project.parent_repo_path or os.path.dirname(project.path)
         relative_path = project.sub_path
-        releases = get_releases_filtered(repo_path, relative_path)
+        releases = await asyncio.to_thread(get_releases_filtered, repo_path, relative_path)
     else:
-        releases = get_releases(project.path)
+        releases = await asyncio.to_thread(get_releases, project.path)
     
     return {"releases": releases}
 
-@router.get("/{project_id}/commits")
+@router.get("/{project_id}/commits", response_model=CommitsResponse)
 async def get_project_commits(project_id: str, limit: int = 50):
     """
     Get list of commits for a project.
@@ -550,15 +740,15 @@ async def get_project_commits(project_id: str, limit: int = 50):
     if project.import_type == "type2_subproject":
         repo_path = project.parent_repo_path or os.path.dirname(project.path)
         relative_path = project.sub_path
-        commits = get_commits_list_filtered(repo_path, relative_path, limit)
+        commits = await asyncio.to_thread(get_commits_list_filtered, repo_path, relative_path, limit)
     else:
-        commits = get_commits_list(project.path, limit)
+        commits = await asyncio.to_thread(get_commits_list, project.path, limit)
     
     return {"commits": commits}
 
 
 @router.get("/{project_id}/schematic")
-async def get_project_schematic(project_id: str):
+async def get_project_schematic(project_id: str, request: Request):
     project = project_service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -566,12 +756,11 @@ async def get_project_schematic(project_id: str):
     path = project_service.find_schematic_file(project.path)
     if not path:
         raise HTTPException(status_code=404, detail="Schematic not found")
-    return FileResponse(path)
+    return _file_response(request, path)
 
 @router.get("/{project_id}/schematic/subsheets")
 async def get_project_subsheets(project_id: str):
-    projects = project_service.get_registered_projects()
-    project = next((p for p in projects if p.id == project_id), None)
+    project = project_service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -585,7 +774,7 @@ async def get_project_subsheets(project_id: str):
     return {"files": subsheet_urls}
 
 @router.get("/{project_id}/pcb")
-async def get_project_pcb(project_id: str):
+async def get_project_pcb(project_id: str, request: Request):
     project = project_service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -593,10 +782,10 @@ async def get_project_pcb(project_id: str):
     path = project_service.find_pcb_file(project.path)
     if not path:
         raise HTTPException(status_code=404, detail="PCB not found")
-    return FileResponse(path)
+    return _file_response(request, path)
 
 @router.get("/{project_id}/3d-model")
-async def get_project_3d_model(project_id: str):
+async def get_project_3d_model(project_id: str, request: Request):
     project = project_service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -604,10 +793,10 @@ async def get_project_3d_model(project_id: str):
     path = project_service.find_3d_model(project.path)
     if not path:
         raise HTTPException(status_code=404, detail="3D model not found")
-    return FileResponse(path)
+    return _file_response(request, path)
 
 @router.get("/{project_id}/ibom")
-async def get_project_ibom(project_id: str):
+async def get_project_ibom(project_id: str, request: Request):
     project = project_service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -615,7 +804,7 @@ async def get_project_ibom(project_id: str):
     path = project_service.find_ibom_file(project.path)
     if not path:
         raise HTTPException(status_code=404, detail="iBoM not found")
-    return FileResponse(path)
+    return _file_response(request, path)
 
 
 # Path Configuration Endpoints
@@ -671,12 +860,9 @@ async def update_project_config(project_id: str, config: PathConfig):
     # Validate the config before saving
     validation = path_config_service.validate_config(project.path, config)
     
-    # Save the configuration
+    # Save the configuration (also refreshes the cached config)
     path_config_service.save_path_config(project.path, config)
     
-    # Clear cache to ensure fresh resolution
-    path_config_service.clear_config_cache(project.path)
-    
     # Get resolved paths
     resolved = path_config_service.resolve_paths(project.path, config)
     
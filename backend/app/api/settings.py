@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 import os
-import subprocess
 from pathlib import Path
 from pydantic import BaseModel
+from typing import Optional, Tuple
 import logging
+from app.core.paths import SSH_DIR, PRIVATE_KEY, PUBLIC_KEY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,11 +13,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# In Docker, home is /root. SSH keys are usually in ~/.ssh
-# We use resolve() to get the absolute path to avoid any ambiguity
-SSH_DIR = (Path.home() / ".ssh").resolve()
-PRIVATE_KEY = SSH_DIR / "id_ed25519"
-PUBLIC_KEY = SSH_DIR / "id_ed25519.pub"
 
 class SSHKeyResponse(BaseModel):
     exists: bool
@@ -24,19 +21,59 @@ class SSHKeyResponse(BaseModel):
 class GenerateSSHKeyRequest(BaseModel):
     email: str = "kicad-prism@example.com"
 
+# ((mtime_ns, size), content) of the public key as last read; a changed stat re-reads it.
+_public_key_cache: Optional[Tuple[Tuple[int, int], str]] = None
+
+# Blocking filesystem helpers; async endpoints run them with asyncio.to_thread.
+def _read_key(path: Path) -> str:
+    with open(path, "r") as f:
+        return f.read().strip()
+
+def _read_public_key() -> str:
+    """Read the public key, reusing the cached content while its stat is unchanged."""
+    global _public_key_cache
+    st = os.stat(PUBLIC_KEY)
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _public_key_cache is not None and _public_key_cache[0] == stamp:
+        return _public_key_cache[1]
+
+    logger.info(f"Checking for SSH public key at: {PUBLIC_KEY}")
+    key_content = _read_key(PUBLIC_KEY)
+    logger.info("SSH public key found and read successfully.")
+    _public_key_cache = (stamp, key_content)
+    return key_content
+
+def _remove_existing_keys() -> None:
+    os.remove(PRIVATE_KEY)
+    if PUBLIC_KEY.exists():
+        os.remove(PUBLIC_KEY)
+        logger.info("Existing public key removed.")
+
+def _prepare_ssh_dir() -> None:
+    if not SSH_DIR.exists():
+        logger.info(f"Creating SSH directory: {SSH_DIR}")
+        SSH_DIR.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"Setting permissions 0o700 on {SSH_DIR}")
+    os.chmod(SSH_DIR, 0o700)
+
+def _secure_private_key() -> bool:
+    """Restrict the private key to its owner; False if it is missing."""
+    if not PRIVATE_KEY.exists():
+        return False
+    logger.info(f"Setting permissions 0o600 on {PRIVATE_KEY}")
+    os.chmod(PRIVATE_KEY, 0o600)
+    return True
+
 @router.get("/ssh-key", response_model=SSHKeyResponse)
 async def get_ssh_key():
     """Get the current SSH public key if it exists."""
-    logger.info(f"Checking for SSH public key at: {PUBLIC_KEY}")
-    if not PUBLIC_KEY.exists():
+    try:
+        key_content = await asyncio.to_thread(_read_public_key)
+        return {"exists": True, "public_key": key_content}
+    except FileNotFoundError:
         logger.info("SSH public key not found.")
         return {"exists": False, "public_key": None}
-    
-    try:
-        with open(PUBLIC_KEY, "r") as f:
-            key_content = f.read().strip()
-            logger.info("SSH public key found and read successfully.")
-            return {"exists": True, "public_key": key_content}
     except Exception as e:
         logger.error(f"Error reading public key: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error reading public key: {str(e)}")
@@ -44,30 +81,24 @@ async def get_ssh_key():
 @router.post("/ssh-key/generate")
 async def generate_ssh_key(request: GenerateSSHKeyRequest):
     """Generate a new Ed25519 SSH key."""
+    global _public_key_cache
+    _public_key_cache = None
     logger.info(f"Starting SSH key generation for email: {request.email}")
     logger.info(f"SSH Directory: {SSH_DIR}")
     logger.info(f"Private Key Path: {PRIVATE_KEY}")
     logger.info(f"Public Key Path: {PUBLIC_KEY}")
 
-    if PRIVATE_KEY.exists():
+    if await asyncio.to_thread(PRIVATE_KEY.exists):
         logger.info("Existing private key found. Removing it.")
         try:
-             os.remove(PRIVATE_KEY)
-             if PUBLIC_KEY.exists():
-                 os.remove(PUBLIC_KEY)
-                 logger.info("Existing public key removed.")
+             await asyncio.to_thread(_remove_existing_keys)
         except OSError as e:
              logger.error(f"Failed to remove existing key: {e}")
              raise HTTPException(status_code=500, detail=f"Failed to remove existing key: {e}")
     
     # Ensure .ssh directory exists and has correct permissions
     try:
-        if not SSH_DIR.exists():
-            logger.info(f"Creating SSH directory: {SSH_DIR}")
-            SSH_DIR.mkdir(parents=True, exist_ok=True)
-        
-        logger.info(f"Setting permissions 0o700 on {SSH_DIR}")
-        os.chmod(SSH_DIR, 0o700)
+        await asyncio.to_thread(_prepare_ssh_dir)
     except Exception as e:
         logger.error(f"Failed to create/chmod SSH directory: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to setup SSH directory: {str(e)}")
@@ -77,30 +108,30 @@ async def generate_ssh_key(request: GenerateSSHKeyRequest):
         command = ["ssh-keygen", "-t", "ed25519", "-C", request.email, "-N", "", "-f", str(PRIVATE_KEY)]
         logger.info(f"Running command: {' '.join(command)}")
         
-        subprocess.run(
-            command,
-            check=True,
-            capture_output=True
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
         )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            error_msg = stderr.decode() if stderr else "Unknown error"
+            logger.error(f"ssh-keygen failed: {error_msg}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate SSH key: {error_msg}")
         logger.info("ssh-keygen command completed successfully.")
         
         # Ensure private key has correct permissions
-        if PRIVATE_KEY.exists():
-            logger.info(f"Setting permissions 0o600 on {PRIVATE_KEY}")
-            os.chmod(PRIVATE_KEY, 0o600)
-        else:
+        if not await asyncio.to_thread(_secure_private_key):
             logger.error("Private key file not found after generation!")
             raise HTTPException(status_code=500, detail="Key generation appeared to succeed but file is missing.")
         
-        with open(PUBLIC_KEY, "r") as f:
-            content = f.read().strip()
-            logger.info("Public key read successfully returning result.")
-            return {"success": True, "public_key": content}
-
-    except subprocess.CalledProcessError as e:
-        error_msg = e.stderr.decode() if e.stderr else "Unknown error"
-        logger.error(f"ssh-keygen failed: {error_msg}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate SSH key: {error_msg}")
+        content = await asyncio.to_thread(_read_key, PUBLIC_KEY)
+        _public_key_cache = None
+        logger.info("Public key read successfully returning result.")
+        return {"success": True, "public_key": content}
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"An unexpected error occurred during key generation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
@@ -0,0 +1,13 @@
+"""
+Filesystem locations shared across the application.
+
+In Docker, home is /root. SSH keys are usually in ~/.ssh.
+We use resolve() to get the absolute path to avoid any ambiguity.
+"""
+from pathlib import Path
+
+
+SSH_DIR = (Path.home() / ".ssh").resolve()
+KNOWN_HOSTS = SSH_DIR / "known_hosts"
+PRIVATE_KEY = SSH_DIR / "id_ed25519"
+PUBLIC_KEY = SSH_DIR / "id_ed25519.pub"
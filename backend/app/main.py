@@ -9,9 +9,15 @@ from app.api.settings import router as settings_router
 from app.services.git_service import router as git_router
 from app.services.comments_store_service import initialize_comments_store
 from app.core.config import settings
-import subprocess
+from app.core.paths import SSH_DIR, KNOWN_HOSTS
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
 import os
 from pathlib import Path
+from typing import List, Optional, Set, Tuple
 from contextlib import asynccontextmanager
 
 import logging
@@ -20,72 +26,144 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def configure_git():
+async def configure_git():
     """Configure Git with GITHUB_TOKEN if available."""
     if settings.GITHUB_TOKEN:
         logger.info(f"Configuring Git to use GITHUB_TOKEN...")
         try:
             # git config --global url."https://${GITHUB_TOKEN}@github.com/".insteadOf "https://github.com/"
             token_url = f"https://{settings.GITHUB_TOKEN}@github.com/"
-            subprocess.run(
-                ["git", "config", "--global", f"url.{token_url}.insteadOf", "https://github.com/"],
-                check=True
+            proc = await asyncio.create_subprocess_exec(
+                "git", "config", "--global", f"url.{token_url}.insteadOf", "https://github.com/"
             )
+            if await proc.wait() != 0:
+                raise RuntimeError(f"git config exited with status {proc.returncode}")
             logger.info("Git successfully configured with token injection.")
         except Exception as e:
             logger.error(f"Failed to configure Git with token: {e}")
 
-def scan_known_hosts():
+# Maximum number of ssh-keyscan probes in flight at startup
+KEYSCAN_CONCURRENCY = 4
+
+# Parsed known_hosts: (mtime_ns, plain host names, [(salt, hash)] for hashed entries)
+_known_hosts_cache: Optional[Tuple[int, Set[str], List[Tuple[bytes, bytes]]]] = None
+
+def load_known_hosts(known_hosts: Path) -> Tuple[Set[str], List[Tuple[bytes, bytes]]]:
+    """Parse known_hosts into plain names and hashed (|1|salt|hash) entries, reusing the last parse while mtime is unchanged."""
+    global _known_hosts_cache
+    try:
+        mtime = known_hosts.stat().st_mtime_ns
+    except OSError:
+        return set(), []
+    if _known_hosts_cache is not None and _known_hosts_cache[0] == mtime:
+        return _known_hosts_cache[1], _known_hosts_cache[2]
+
+    plain: Set[str] = set()
+    hashed: List[Tuple[bytes, bytes]] = []
+    with open(known_hosts, "r", errors="replace") as f:
+        for line in f:
+            parts = line.split(None, 2)
+            if parts and parts[0].startswith("@"):
+                # @cert-authority / @revoked marker precedes the host names
+                parts = parts[1:]
+            if not parts or parts[0].startswith("#"):
+                continue
+            names = parts[0]
+            if names.startswith("|1|"):
+                try:
+                    _, _, salt, digest = names.split("|", 3)
+                    hashed.append((base64.b64decode(salt), base64.b64decode(digest)))
+                except (ValueError, binascii.Error):
+                    continue
+            else:
+                plain.update(name.lower() for name in names.split(","))
+
+    _known_hosts_cache = (mtime, plain, hashed)
+    return plain, hashed
+
+def is_known_host(host: str, known: Tuple[Set[str], List[Tuple[bytes, bytes]]]) -> bool:
+    """Equivalent of `ssh-keygen -F host` against a parsed known_hosts."""
+    plain, hashed = known
+    host = host.lower()
+    if host in plain:
+        return True
+    encoded = host.encode()
+    return any(
+        hmac.compare_digest(hmac.new(salt, encoded, hashlib.sha1).digest(), digest)
+        for salt, digest in hashed
+    )
+
+def _append_known_hosts(known_hosts: Path, entries: str):
+    with open(known_hosts, "a") as f:
+        f.write(entries)
+
+def _touch_known_hosts(known_hosts: Path):
+    if not known_hosts.exists():
+        known_hosts.touch(mode=0o644)
+
+def _prepare_ssh_dir(ssh_dir: Path):
+    ssh_dir.mkdir(parents=True, exist_ok=True)
+    os.chmod(ssh_dir, 0o700)
+
+async def scan_host(host: str, known: Tuple[Set[str], List[Tuple[bytes, bytes]]], limit: asyncio.Semaphore) -> Optional[str]:
+    """Return ssh-keyscan output for a host missing from known_hosts, or None."""
+    try:
+        # Check if host is already known (plain or hashed entries)
+        if is_known_host(host, known):
+            logger.debug(f"Host {host} already in known_hosts.")
+            return None
+
+        logger.info(f"Host {host} not found in known_hosts. Scanning...")
+        async with limit:
+            scan = await asyncio.create_subprocess_exec(
+                "ssh-keyscan", "-H", host,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await scan.communicate()
+        if scan.returncode == 0 and stdout:
+            return stdout.decode()
+        logger.warning(f"Failed to scan {host}. Error: {stderr.decode()}")
+    except Exception as e:
+        logger.error(f"Error checking/scanning host {host}: {e}")
+    return None
+
+async def scan_known_hosts():
     """Scan and add GitHub/GitLab to known_hosts if missing."""
-    ssh_dir = Path.home() / ".ssh"
-    known_hosts = ssh_dir / "known_hosts"
     hosts = ["github.com", "gitlab.com"]
     
     # Ensure known_hosts exists
-    if not known_hosts.exists():
-        try:
-            known_hosts.touch(mode=0o644)
-        except Exception as e:
-            logger.error(f"Failed to create known_hosts file: {e}")
-            return
+    try:
+        await asyncio.to_thread(_touch_known_hosts, KNOWN_HOSTS)
+    except Exception as e:
+        logger.error(f"Failed to create known_hosts file: {e}")
+        return
 
-    for host in hosts:
-        try:
-            # Check if host is already known using ssh-keygen -F (Find)
-            # This checks hashed hosts too
-            result = subprocess.run(
-                ["ssh-keygen", "-F", host], 
-                capture_output=True
-            )
-            
-            if result.returncode != 0:
-                logger.info(f"Host {host} not found in known_hosts. Scanning...")
-                # Scan and append to known_hosts
-                scan = subprocess.run(
-                    ["ssh-keyscan", "-H", host], 
-                    capture_output=True, 
-                    text=True
-                )
-                if scan.returncode == 0 and scan.stdout:
-                    with open(known_hosts, "a") as f:
-                        f.write(scan.stdout)
-                    logger.info(f"Successfully added {host} to known_hosts.")
-                else:
-                    logger.warning(f"Failed to scan {host}. Error: {scan.stderr}")
-            else:
-                logger.debug(f"Host {host} already in known_hosts.")
-                
-        except Exception as e:
-            logger.error(f"Error checking/scanning host {host}: {e}")
+    try:
+        known = await asyncio.to_thread(load_known_hosts, KNOWN_HOSTS)
+    except Exception as e:
+        logger.error(f"Failed to read known_hosts file: {e}")
+        return
 
-def ensure_ssh_dir():
+    # Hosts are independent; probe them concurrently (bounded), then append
+    # every new entry with a single write.
+    limit = asyncio.Semaphore(KEYSCAN_CONCURRENCY)
+    results = await asyncio.gather(*(scan_host(host, known, limit) for host in hosts))
+    scanned = {host: entries for host, entries in zip(hosts, results) if entries}
+    if not scanned:
+        return
+    try:
+        await asyncio.to_thread(_append_known_hosts, KNOWN_HOSTS, "".join(scanned.values()))
+        logger.info(f"Successfully added {', '.join(scanned)} to known_hosts.")
+    except Exception as e:
+        logger.error(f"Failed to update known_hosts file: {e}")
+
+async def ensure_ssh_dir():
     """Ensure ~/.ssh exists and has correct permissions."""
-    ssh_dir = Path.home() / ".ssh"
     try:
-        ssh_dir.mkdir(parents=True, exist_ok=True)
-        os.chmod(ssh_dir, 0o700)
+        await asyncio.to_thread(_prepare_ssh_dir, SSH_DIR)
         
-        scan_known_hosts()
+        await scan_known_hosts()
         
         logger.info("SSH directory configured correctly.")
     except Exception as e:
@@ -94,8 +172,8 @@ def ensure_ssh_dir():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    configure_git()
-    ensure_ssh_dir()
+    # Independent: git config and the SSH/known_hosts setup overlap
+    await asyncio.gather(configure_git(), ensure_ssh_dir())
     initialize_comments_store()
     yield
 
@@ -110,11 +188,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include Routers
-app.include_router(git_router, prefix="/api/git", tags=["git"])
-app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
-app.include_router(projects_router, prefix="/api/projects", tags=["projects"])
-app.include_router(comments_router, prefix="/api/projects", tags=["comments"])
-app.include_router(diff_router, prefix="/api/projects", tags=["diff"])
-app.include_router(settings_router, prefix="/api/settings", tags=["settings"])
-app.include_router(folders_router, prefix="/api/folders", tags=["folders"])
+# Include Routers: (router, prefix, tag)
+ROUTERS = [
+    (git_router, "/api/git", "git"),
+    (auth_router, "/api/auth", "auth"),
+    (projects_router, "/api/projects", "projects"),
+    (comments_router, "/api/projects", "comments"),
+    (diff_router, "/api/projects", "diff"),
+    (settings_router, "/api/settings", "settings"),
+    (folders_router, "/api/folders", "folders"),
+]
+
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
@@ -1,83 +1,127 @@
 import csv
 import io
-from typing import List, Dict, Any, Optional
+import sys
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
 
+@lru_cache(maxsize=8)
 def parse_bom_csv(csv_content: str) -> List[Dict[str, str]]:
-    """Parse CSV content into a list of component dictionaries."""
+    """
+    Parse CSV content into a list of component dictionaries.
+    Results are memoized per content (the same commit is often diffed
+    against several others), so callers must not mutate them.
+    """
     f = io.StringIO(csv_content)
     # KiCad export might have different delimiters or delimiters in quotes
     # kicad-cli sch export bom defaults to "," and """
-    reader = csv.DictReader(f)
-    return [row for row in reader]
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return []
+    # Interned keys are shared with the interned field names in diff_boms,
+    # so row lookups match by identity instead of comparing strings.
+    header = [sys.intern(name) for name in header]
+    # Plain reader + zip: DictReader does per-row bookkeeping for ragged rows
+    # in Python; rows from kicad-cli always match the header.
+    return [dict(zip(header, row)) for row in reader if row]
+
+def _project_rows(bom: List[Dict[str, str]], fields: List[str]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Map Reference -> tuple of field values, so rows compare with a single
+    tuple comparison and dicts are only built for rows that are emitted.
+    """
+    getter = itemgetter(*fields)
+    if len(fields) == 1:
+        # itemgetter with one key returns the bare value
+        single = getter
+        getter = lambda row: (single(row),)
+    projected: Dict[str, Tuple[str, ...]] = {}
+    for row in bom:
+        ref = row.get('Reference')
+        if ref:
+            try:
+                projected[ref] = getter(row)
+            except KeyError:
+                # Short row or field not exported; missing values compare as ''
+                projected[ref] = tuple(row.get(f, '') for f in fields)
+    return projected
 
-def diff_boms(old_bom: List[Dict[str, str]], new_bom: List[Dict[str, str]], fields: List[str]) -> Dict[str, Any]:
+def diff_boms(old_bom: List[Dict[str, str]], new_bom: List[Dict[str, str]], fields: List[str],
+              include_unchanged: bool = True) -> Dict[str, Any]:
     """
     Compare two BoMs and return a structured diff.
     Components are matched by 'Reference'.
+    Unchanged rows are included (for the full-table view) unless include_unchanged is False.
     """
-    old_map = {row.get('Reference', ''): row for row in old_bom if row.get('Reference')}
-    new_map = {row.get('Reference', ''): row for row in new_bom if row.get('Reference')}
-    
-    all_refs = sorted(list(set(old_map.keys()) | set(new_map.keys())))
-    
-    changes = []
-    summary = {"added": 0, "removed": 0, "changed": 0}
-    
     # Ensure Reference is always in fields for display/comparison
     if 'Reference' not in fields:
         fields = ['Reference'] + fields
+    fields = [sys.intern(f) for f in fields]
 
-    for ref in all_refs:
-        old_item = old_map.get(ref)
-        new_item = new_map.get(ref)
-        
-        if not old_item:
-            # Added
-            summary["added"] += 1
+    old_map = _project_rows(old_bom, fields)
+    # Identical BoMs (e.g. same CSV parsed once) only need projecting once
+    new_map = old_map if new_bom is old_bom else _project_rows(new_bom, fields)
+    # Key views support set operations directly; no intermediate set copies
+    old_refs = old_map.keys()
+    new_refs = new_map.keys()
+    
+    added = new_refs - old_refs
+    removed = old_refs - new_refs
+
+    changes: List[Dict[str, Any]] = []
+    summary: Dict[str, int] = {
+        "added": len(added),
+        "removed": len(removed),
+        "changed": 0
+    }
+
+    for ref in sorted(added):
+        changes.append({
+            "ref": ref,
+            "status": "added",
+            "new": dict(zip(fields, new_map[ref]))
+        })
+
+    for ref in sorted(removed):
+        changes.append({
+            "ref": ref,
+            "status": "removed",
+            "old": dict(zip(fields, old_map[ref]))
+        })
+
+    # Common refs are the bulk of any BoM: one branch per row
+    for ref in sorted(old_refs & new_refs):
+        old_values = old_map[ref]
+        new_values = new_map[ref]
+        if old_values != new_values:
+            # Only changed rows pay for the per-field comparison
+            summary["changed"] += 1
             changes.append({
                 "ref": ref,
-                "status": "added",
-                "new": {f: new_item.get(f, '') for f in fields}
+                "status": "changed",
+                "old": dict(zip(fields, old_values)),
+                "new": dict(zip(fields, new_values)),
+                "diffs": {
+                    f: {"old": old_val, "new": new_val}
+                    for f, old_val, new_val in zip(fields, old_values, new_values)
+                    if old_val != new_val
+                }
             })
-        elif not new_item:
-            # Removed
-            summary["removed"] += 1
+        elif include_unchanged:
+            # The diff viewer shows the whole BoM with highlights, so
+            # unchanged rows are returned too; old and new are equal.
+            values = dict(zip(fields, new_values))
             changes.append({
                 "ref": ref,
-                "status": "removed",
-                "old": {f: old_item.get(f, '') for f in fields}
+                "status": "unchanged",
+                "old": values,
+                "new": values
             })
-        else:
-            # Check for changes in the specified fields
-            diffs = {}
-            is_changed = False
-            for f in fields:
-                old_val = old_item.get(f, '')
-                new_val = new_item.get(f, '')
-                if old_val != new_val:
-                    is_changed = True
-                    diffs[f] = {"old": old_val, "new": new_val}
-            
-            if is_changed:
-                summary["changed"] += 1
-                changes.append({
-                    "ref": ref,
-                    "status": "changed",
-                    "old": {f: old_item.get(f, '') for f in fields},
-                    "new": {f: new_item.get(f, '') for f in fields},
-                    "diffs": diffs
-                })
-            # If not changed, we don't necessarily need to return it unless we want a full table
-            # For the diff viewer, we only show changes?
-            # User might want to see the whole BoM with highlights. 
-            # Let's return all items but with status 'unchanged'
-            else:
-                changes.append({
-                    "ref": ref,
-                    "status": "unchanged",
-                    "old": {f: old_item.get(f, '') for f in fields},
-                    "new": {f: new_item.get(f, '') for f in fields}
-                })
+
+    # The viewer renders rows in reference order. Each group is already
+    # sorted, so this is a cheap merge of three runs.
+    changes.sort(key=itemgetter("ref"))
 
     return {
         "summary": summary,
@@ -10,22 +10,72 @@ import threading
 import uuid
 import shutil
 import time
+import hashlib
 import json
+import mmap
 import re
+import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from app.services.project_service import get_registered_projects
 from app.services import bom_diff_service
 
 # Global job store
 # Structure: { job_id: { ... } }
 diff_jobs: Dict[str, dict] = {}
+# Guards diff_jobs membership and job state transitions; log appends
+# (list.append) are atomic and stay outside it
+_jobs_lock = threading.RLock()
 
 # Configuration
 MAX_JOB_AGE_SECONDS = 3600 * 24  # 24 hours
+DIFF_ROOT = Path("/tmp/prism_diff")
+# Completed diffs of commit pairs, reused by later jobs for the same pair
+DIFF_CACHE_DIR = DIFF_ROOT / "cache"
+_FULL_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+# Shared by every job: each exported SVG is colorized independently
+_colorize_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="svg-colorize")
 
 import platform
 
+def _windows_cli_paths() -> List[str]:
+    """Candidate kicad-cli.exe paths under Program Files, newest version first."""
+    paths_to_check = []
+    # Check standard C:\Program Files paths, possibly trying different versions
+    program_files = os.environ.get("ProgramFiles", "C:\\Program Files")
+    kicad_root = Path(program_files) / "KiCad"
+    if kicad_root.exists():
+        # Try to find the latest version bin folder
+        # Usually KiCad/8.0/bin/kicad-cli.exe
+        versions = sorted([d for d in kicad_root.iterdir() if d.is_dir()], reverse=True)
+        for v in versions:
+            candidate = v / "bin" / "kicad-cli.exe"
+            if candidate.exists():
+                paths_to_check.append(str(candidate))
+    
+    # Fallback to direct path if version detection fails
+    paths_to_check.append(f"{program_files}\\KiCad\\8.0\\bin\\kicad-cli.exe")
+    paths_to_check.append(f"{program_files}\\KiCad\\7.0\\bin\\kicad-cli.exe")
+    return paths_to_check
+
+# Common OS-specific installation paths, keyed by platform.system()
+_CLI_PATHS = {
+    "Darwin": lambda: [
+        "/Applications/KiCad/KiCad.app/Contents/MacOS/kicad-cli",
+        os.path.expanduser("~/Applications/KiCad/KiCad.app/Contents/MacOS/kicad-cli")
+    ],
+    "Windows": _windows_cli_paths,
+    "Linux": lambda: [
+        "/usr/bin/kicad-cli",
+        "/usr/local/bin/kicad-cli",
+        # Flatpak fallback
+        "/var/lib/flatpak/exports/bin/org.kicad.KiCad"
+    ],
+}
+
 def _get_cli_command() -> str:
     """Find valid kicad-cli command across different OS platforms."""
     # 1. Check environment variable override
@@ -34,50 +84,14 @@ def _get_cli_command() -> str:
         return env_path
 
     # 2. Check PATH
-    cli_name = "kicad-cli.exe" if platform.system() == "Windows" else "kicad-cli"
+    system = platform.system()
+    cli_name = "kicad-cli.exe" if system == "Windows" else "kicad-cli"
     if shutil.which(cli_name):
         return cli_name
     
-    # 3. Check common OS-specific installation paths
-    system = platform.system()
-    paths_to_check = []
-
-    if system == "Darwin": # macOS
-        paths_to_check = [
-            "/Applications/KiCad/KiCad.app/Contents/MacOS/kicad-cli",
-            os.path.expanduser("~/Applications/KiCad/KiCad.app/Contents/MacOS/kicad-cli")
-        ]
-    elif system == "Windows":
-        # Check standard C:\Program Files paths, possibly trying different versions
-        program_files = os.environ.get("ProgramFiles", "C:\\Program Files")
-        kicad_root = Path(program_files) / "KiCad"
-        if kicad_root.exists():
-            # Try to find the latest version bin folder
-            # Usually KiCad/8.0/bin/kicad-cli.exe
-            versions = sorted([d for d in kicad_root.iterdir() if d.is_dir()], reverse=True)
-            for v in versions:
-                candidate = v / "bin" / "kicad-cli.exe"
-                if candidate.exists():
-                    paths_to_check.append(str(candidate))
-        
-        # Fallback to direct path if version detection fails
-        paths_to_check.append(f"{program_files}\\KiCad\\8.0\\bin\\kicad-cli.exe")
-        paths_to_check.append(f"{program_files}\\KiCad\\7.0\\bin\\kicad-cli.exe")
-
-    elif system == "Linux":
-        paths_to_check = [
-            "/usr/bin/kicad-cli",
-            "/usr/local/bin/kicad-cli",
-            # Flatpak fallback
-            "/var/lib/flatpak/exports/bin/org.kicad.KiCad" 
-        ]
-    
-    for path in paths_to_check:
-        if os.path.exists(path):
-            return path
-            
-    # Fallback to default name
-    return cli_name
+    # 3. Check common OS-specific installation paths, else the default name
+    paths_to_check = _CLI_PATHS.get(system, list)()
+    return next((path for path in paths_to_check if os.path.exists(path)), cli_name)
 
 CLI_CMD = _get_cli_command()
 print(f"[{platform.system()}] Resolved kicad-cli: {CLI_CMD}")
@@ -103,46 +117,181 @@ def _find_kicad_pcb_file(directory: Path) -> Optional[Path]:
         pass
     return None
 
+def _find_design_files(directory: Path) -> Tuple[Optional[Path], Optional[Path]]:
+    """
+    First .kicad_sch and .kicad_pcb under directory, in one top-down walk
+    (same order as rglob: a directory's own files before its subdirectories).
+    """
+    sch_file = pcb_file = None
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if sch_file is None and name.endswith(".kicad_sch"):
+                sch_file = Path(root) / name
+            elif pcb_file is None and name.endswith(".kicad_pcb"):
+                pcb_file = Path(root) / name
+        if sch_file and pcb_file:
+            break
+    return sch_file, pcb_file
+
 def _cleanup_job(job_id: str):
     """Remove a job directory and entry."""
-    if job_id in diff_jobs:
-        job = diff_jobs[job_id]
+    with _jobs_lock:
+        job = diff_jobs.get(job_id)
+        if job is None:
+            return
         if job.get('status') == 'running':
             # Don't delete running jobs to avoid race conditions with tar/kicad-cli
             job['status'] = 'failed'
             job['error'] = 'Job cancelled by user'
             return
-
-        output_dir = job.get('abs_output_path')
-        if output_dir and os.path.exists(output_dir):
-            try:
-                # Give background threads a moment to finish current syscalls
-                time.sleep(0.5) 
-                shutil.rmtree(output_dir)
-            except Exception as e:
-                print(f"Error cleaning up job {job_id}: {e}")
         del diff_jobs[job_id]
 
+    # The entry is gone, so no request can hand out this directory any more
+    output_dir = job.get('abs_output_path')
+    # Cached outputs are shared with other jobs; pruned by age instead
+    if output_dir and not job.get('cached') and os.path.exists(output_dir):
+        try:
+            # Give background threads a moment to finish current syscalls
+            time.sleep(0.5) 
+            shutil.rmtree(output_dir)
+        except Exception as e:
+            print(f"Error cleaning up job {job_id}: {e}")
+
+def _diff_cache_dir(project_id: str, commit1: str, commit2: str) -> Optional[Path]:
+    """Cache directory for a commit pair, or None if the pair is not immutable (refs, short SHAs)."""
+    if not (_FULL_SHA_RE.fullmatch(commit1) and _FULL_SHA_RE.fullmatch(commit2)):
+        return None
+    key = hashlib.sha1(f"{project_id}|{commit1}|{commit2}".encode()).hexdigest()
+    return (DIFF_CACHE_DIR / key).resolve()
+
+def _prune_diff_cache():
+    """Remove cached diffs that have not been used for MAX_JOB_AGE_SECONDS."""
+    cutoff = time.time() - MAX_JOB_AGE_SECONDS
+    try:
+        entries = list(os.scandir(DIFF_CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+        except OSError as e:
+            print(f"Error pruning cached diff {entry.name}: {e}")
+
 def delete_job(job_id: str):
     """Public method to delete a job."""
     _cleanup_job(job_id)
 
-def _snapshot_commit(project_path: Path, commit: str, destination: Path):
-    """Snapshot a commit into destination using git archive."""
+# Files a diff needs from a snapshot: design files, the project-local
+# library tables / drawing sheets kicad-cli resolves, and .prism.json
+SNAPSHOT_SUFFIXES = {".kicad_sch", ".kicad_pcb", ".kicad_pro", ".kicad_sym", ".kicad_wks", ".kicad_dru"}
+SNAPSHOT_NAMES = {"sym-lib-table", "fp-lib-table", ".prism.json"}
+
+def _is_snapshot_member(name: str) -> bool:
+    leaf = name.rpartition("/")[2]
+    return leaf in SNAPSHOT_NAMES or os.path.splitext(leaf)[1] in SNAPSHOT_SUFFIXES
+
+# Above this many paths, archive the whole tree rather than risk the
+# command-line length limit; extraction still filters members.
+MAX_SNAPSHOT_PATHSPECS = 1000
+
+def _list_tree(project_path: Path, commit: str) -> Dict[str, str]:
+    """Map the files of a commit (relative to project_path) that a snapshot needs to their blob SHAs."""
+    res = subprocess.run(
+        ["git", "ls-tree", "-r", "-z", commit],
+        cwd=project_path, capture_output=True
+    )
+    if res.returncode != 0:
+        raise Exception(f"Failed to list tree for {commit}: {res.stderr.decode(errors='replace').strip()}")
+    tree = {}
+    for entry in res.stdout.decode("utf-8", errors="surrogateescape").split("\0"):
+        # "<mode> <type> <sha>\t<path>"
+        info, _, name = entry.partition("\t")
+        if name and _is_snapshot_member(name):
+            tree[name] = info.rpartition(" ")[2]
+    return tree
+
+# Inputs that determine each kicad-cli export; equal blobs mean equal SVGs
+SCH_INPUT_SUFFIXES = {".kicad_sch", ".kicad_sym", ".kicad_pro", ".kicad_wks"}
+PCB_INPUT_SUFFIXES = {".kicad_pcb", ".kicad_pro", ".kicad_dru"}
+
+def _same_inputs(tree1: Dict[str, str], tree2: Dict[str, str], suffixes: set, design_suffix: str) -> bool:
+    """True if both trees hold the same blobs for an export's inputs (and have a design file)."""
+    def inputs(tree):
+        return {
+            path: sha for path, sha in tree.items()
+            if os.path.splitext(path)[1] in suffixes or path.rpartition("/")[2] == "sym-lib-table"
+        }
+    old = inputs(tree2)
+    return any(path.endswith(design_suffix) for path in old) and inputs(tree1) == old
+
+def _snapshot_commit(project_path: Path, commit: str, destination: Path,
+                     tree: Optional[Dict[str, str]] = None):
+    """Snapshot a commit's design files into destination using git archive."""
     destination.mkdir(parents=True, exist_ok=True)
+
+    # Let git pack only the design files instead of the whole tree
+    paths = list(tree if tree is not None else _list_tree(project_path, commit))
+    if not paths:
+        return
     
-    # git archive --format=tar commit | tar -x -C destination
-    tar_cmd = ["git", "archive", "--format=tar", commit]
+    # git archive --format=tar commit -- paths, extracted as it streams
+    tar_cmd = ["git", "--literal-pathspecs", "archive", "--format=tar", commit]
+    if len(paths) <= MAX_SNAPSHOT_PATHSPECS:
+        tar_cmd += ["--", *paths]
     
     # Run in repo root
-    p1 = subprocess.Popen(tar_cmd, cwd=project_path, stdout=subprocess.PIPE)
-    p2 = subprocess.Popen(["tar", "-x", "-C", str(destination)], stdin=p1.stdout)
-    p1.stdout.close()
-    p2.wait()
+    proc = subprocess.Popen(tar_cmd, cwd=project_path, stdout=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=proc.stdout, mode="r|") as tf:
+            for member in tf:
+                # Skip gerbers, 3D models, outputs etc.; the 'data' filter
+                # rejects absolute paths, links out of the tree and devices
+                if member.isfile() and _is_snapshot_member(member.name):
+                    tf.extract(member, destination, filter="data")
+    except tarfile.TarError as e:
+        raise Exception(f"Failed to extract snapshot for {commit}: {e}")
+    finally:
+        proc.stdout.close()
+        proc.wait()
     
-    if p2.returncode != 0:
+    if proc.returncode != 0:
         raise Exception(f"Failed to extract snapshot for {commit}")
 
+# Layers section: (layers ... (count "name" type ...) ...)
+_LAYERS_BEFORE_SETUP_RE = re.compile(rb'\(layers\s+(.*?)\s+\(setup', re.DOTALL)
+_LAYERS_BLOCK_RE = re.compile(rb'\(layers\s+(.*?)\n\s+\)', re.DOTALL)
+_QUOTED_RE = re.compile(rb'"([^"]+)"')
+
+# The header (up to "(setup") is what gets parsed; without a setup block
+# within PCB_SETUP_SCAN_BYTES, only the first PCB_HEADER_BYTES are used.
+PCB_SETUP_SCAN_BYTES = 1024 * 1024
+PCB_HEADER_BYTES = 20000
+
+# Fallback to standard layers if parsing fails
+DEFAULT_PCB_LAYERS = ("F.Cu", "B.Cu", "F.SilkS", "B.SilkS", "F.Mask", "B.Mask", "Edge.Cuts")
+
+@lru_cache(maxsize=256)
+def _parse_pcb_layers(head: bytes) -> Tuple[str, ...]:
+    """
+    Parse layer names from the start of a .kicad_pcb file.
+    Keyed on the bytes read rather than the path: every diff job snapshots
+    into a fresh directory, but unchanged boards have identical headers.
+    """
+    # Find the layers section
+    layers_match = _LAYERS_BEFORE_SETUP_RE.search(head)
+    if not layers_match:
+        # Fallback to a broader search if setup block isn't immediately after
+        layers_match = _LAYERS_BLOCK_RE.search(head)
+        
+    if layers_match:
+        block = layers_match.group(1)
+        # Find all strings in quotes: e.g. (0 "F.Cu" signal)
+        layer_names = [name.decode("utf-8", errors="ignore") for name in _QUOTED_RE.findall(block)]
+        if layer_names:
+            return tuple(layer_names)
+    return DEFAULT_PCB_LAYERS
+
 def _get_pcb_layers(pcb_path: Path) -> List[str]:
     """
     Extract active layer names from the .kicad_pcb file.
@@ -151,31 +300,28 @@ def _get_pcb_layers(pcb_path: Path) -> List[str]:
         return []
         
     try:
-        # Read the beginning of the file to find the layers block
-        # PCB files can be large, but the layers block is usually within the first 10k bytes
-        with open(pcb_path, 'r', encoding='utf-8', errors='ignore') as f:
-            head = f.read(20000)
-            
-        # Find the layers section: (layers ... (count "name" type ...) ...)
-        layers_match = re.search(r'\(layers\s+(.*?)\s+\(setup', head, re.DOTALL)
-        if not layers_match:
-            # Fallback to a broader search if setup block isn't immediately after
-            layers_match = re.search(r'\(layers\s+(.*?)\n\s+\)', head, re.DOTALL)
-            
-        if layers_match:
-            block = layers_match.group(1)
-            # Find all strings in quotes: e.g. (0 "F.Cu" signal)
-            layer_names = re.findall(r'"([^"]+)"', block)
-            if layer_names:
-                return layer_names
-                
+        # Map the file and slice out only the header; the layers block sits
+        # just before (setup, so large boards are never read in full
+        with open(pcb_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return list(DEFAULT_PCB_LAYERS)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                setup = mm.find(b"(setup", 0, PCB_SETUP_SCAN_BYTES)
+                end = setup + len(b"(setup") if setup != -1 else PCB_HEADER_BYTES
+                head = mm[:end]
+        return list(_parse_pcb_layers(head))
     except Exception as e:
         print(f"Error parsing PCB layers: {e}")
         
-    # Fallback to standard layers if parsing fails
-    return ["F.Cu", "B.Cu", "F.SilkS", "B.SilkS", "F.Mask", "B.Mask", "Edge.Cuts"]
+    return list(DEFAULT_PCB_LAYERS)
     
 
+# Black as emitted by --black-and-white, in attribute (stroke="...") or
+# style (stroke:...) form. One pass over the bytes handles both.
+_BLACK = rb'(?:\#000000|\#000|black|rgb\(0,\s*0,\s*0\))'
+_BLACK_COLOR_RE = re.compile(rb'(stroke|fill)(?:(=")' + _BLACK + rb'"|:' + _BLACK + rb')')
+
 def _colorize_svg(svg_path: Path, color: str):
     """
     Replaces black lines/fills in the SVG with the specified color.
@@ -183,32 +329,186 @@ def _colorize_svg(svg_path: Path, color: str):
     """
     if not svg_path.exists():
         return
-        
-    content = svg_path.read_text(encoding="utf-8")
-    
-    # Regex for black colors
-    # Matches: stroke="#000000", stroke="black", stroke="rgb(0,0,0)", fill="..."
-    # We want to replace the color value with our target color.
-    
-    # Pattern: (stroke|fill)="(?:\#000000|\#000|black|rgb\(0,\s*0,\s*0\))"
-    pattern = r'(stroke|fill)="(?:\#000000|\#000|black|rgb\(0,\s*0,\s*0\))"'
-    
+
+    attr_color = b'="' + color.encode() + b'"'
+    style_color = b':' + color.encode()
+
     def replacer(match):
-        attr = match.group(1)
-        return f'{attr}="{color}"'
-        
-    content = re.sub(pattern, replacer, content)
-    
-    # Also handle style="..." blocks if used
-    # style="...; fill:#000000; ..."
-    style_pattern = r'(fill|stroke):(?:\#000000|\#000|black|rgb\(0,\s*0,\s*0\))'
-    content = re.sub(style_pattern, f'\\1:{color}', content)
-        
-    svg_path.write_text(content, encoding="utf-8")
+        return match.group(1) + (attr_color if match.group(2) else style_color)
+
+    with open(svg_path, 'r+b') as f:
+        content = f.read()
+        # KiCad writes the canonical #000000; plain replaces cover that
+        for attr in (b'stroke', b'fill'):
+            content = content.replace(attr + b'="#000000"', attr + attr_color)
+            content = content.replace(attr + b':#000000', attr + style_color)
+        # Any other black spelling left over goes through the regex
+        if b'#000' in content or b'black' in content or b'rgb(0' in content:
+            content = _BLACK_COLOR_RE.sub(replacer, content)
+        f.seek(0)
+        f.write(content)
+        f.truncate()
+
+def _colorize_svgs(svg_paths: List[Path], color: str):
+    """Colorize a batch of SVGs on the shared pool; re-raises the first failure."""
+    for _ in _colorize_pool.map(lambda svg: _colorize_svg(svg, color), svg_paths):
+        pass
+
+def _mirror_svgs(svg_paths: List[Path], target_dir: Path) -> List[Path]:
+    """Copy still-black exported SVGs into another commit's output directory."""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    copies = []
+    for svg in svg_paths:
+        copy = target_dir / svg.name
+        shutil.copyfile(svg, copy)
+        copies.append(copy)
+    return copies
+
+def _start_cli(cmd: List[str]) -> subprocess.Popen:
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+def _finish_cli(proc: subprocess.Popen) -> subprocess.CompletedProcess:
+    """Wait for a _start_cli process; same result as subprocess.run(capture_output=True)."""
+    stdout, stderr = proc.communicate()
+    return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+def _export_commit(project_path: Path, commit: str, directory: Path, color: str, is_new: bool,
+                   job: dict, manifest: dict, manifest_lock: threading.Lock,
+                   tree: Optional[Dict[str, str]] = None, skip: frozenset = frozenset(),
+                   mirror: Optional[Tuple[Path, str, frozenset]] = None):
+    """
+    Snapshot one commit and export its schematic and PCB SVGs.
+    Kinds ("sch"/"pcb") in skip are not exported; kinds in mirror's set are
+    also copied to and colorized for the other commit, whose inputs are identical.
+    """
+    job['logs'].append(f"Snapshotting commit {commit}...")
+    _snapshot_commit(project_path, commit, directory, tree)
+
+    # Locate design files
+    sch_file, pcb_file = _find_design_files(directory)
+    mirror_dir, mirror_color, mirror_kinds = mirror or (None, None, frozenset())
+
+    if "sch" in skip:
+        sch_file = None
+        job['logs'].append(f"Schematic inputs unchanged; reusing export for {commit}")
+    if "pcb" in skip:
+        pcb_file = None
+        job['logs'].append(f"PCB inputs unchanged; reusing export for {commit}")
+
+    # Both exports are launched before either is awaited, so the two
+    # kicad-cli start-ups (and renders) overlap
+    sch_proc = pcb_proc = None
+
+    # Export Schematics
+    if sch_file:
+        sch_out_dir = directory / "sch"
+        sch_out_dir.mkdir(exist_ok=True)
+        job['logs'].append(f"Exporting Schematics for {commit}...")
+
+        cmd = [
+            CLI_CMD, "sch", "export", "svg",
+            "--black-and-white",
+            "--output", str(sch_out_dir),
+            str(sch_file)
+        ]
+        job['logs'].append(f"SCH CMD: {' '.join(cmd)}")
+        sch_proc = _start_cli(cmd)
+
+    # Export PCB Layers
+    if pcb_file:
+        pcb_out_dir = directory / "pcb"
+        pcb_out_dir.mkdir(exist_ok=True)
+        job['logs'].append(f"Exporting PCB Layers for {commit} from {pcb_file}...")
+
+        # We export standard layers in one shot using --mode-multi
+        all_layers = _get_pcb_layers(pcb_file)
+        cmd = [
+            CLI_CMD, "pcb", "export", "svg",
+            "--mode-multi",
+            "--layers", ",".join(all_layers),
+            "--black-and-white",
+            "--exclude-drawing-sheet",
+            "--page-size-mode", "2",
+            "--output", str(pcb_out_dir),
+            str(pcb_file)
+        ]
+        job['logs'].append(f"PCB CMD: {' '.join(cmd)}")
+        pcb_proc = _start_cli(cmd)
+    elif "pcb" not in skip:
+        job['logs'].append(f"No .kicad_pcb found for {commit}")
+
+    if sch_proc:
+        res = _finish_cli(sch_proc)
+
+        if res.returncode == 0:
+            found_svgs = list(sch_out_dir.glob("*.svg"))
+            if "sch" in mirror_kinds:
+                _colorize_svgs(_mirror_svgs(found_svgs, mirror_dir / "sch"), mirror_color)
+            _colorize_svgs(found_svgs, color)
+
+            if is_new:
+                with manifest_lock:
+                    manifest["schematic"] = True
+                    manifest["sheets"] = sorted([f.name for f in found_svgs])
+        else:
+            job['logs'].append(f"SCH Export FAILED (Code {res.returncode})")
+
+    if pcb_proc:
+        res = _finish_cli(pcb_proc)
+
+        if res.returncode == 0:
+            # KiCad names these {project}-{layer}.svg or just {layer}.svg
+            # We normalize them to {layer_name}.svg for the frontend
+            found_layers = []
+            layer_svgs = []
+            job['logs'].append(f"PCB Export success. Dir content: {list(pcb_out_dir.glob('*.svg'))}")
+
+            # KiCad writes F.Cu as F_Cu; map back to the original layer name
+            # (first layer wins if two normalize the same)
+            norm_to_layer = {}
+            for l in all_layers:
+                norm_to_layer.setdefault(l.replace(".", "_"), l)
+
+            for svg in list(pcb_out_dir.glob("*.svg")):
+                leaf = svg.name
+                layer_part = leaf
+                if leaf.startswith(pcb_file.stem + "-"):
+                    layer_part = leaf[len(pcb_file.stem)+1:]
+
+                # Match back to the original layer name to ensure F.Cu vs F_Cu consistency
+                matched_layer = norm_to_layer.get(layer_part.replace(".svg", ""))
+
+                if matched_layer:
+                    target_svg = pcb_out_dir / (matched_layer.replace(".", "_") + ".svg")
+                    job['logs'].append(f"Matched {leaf} -> {matched_layer} (Target: {target_svg.name})")
+                    if svg.resolve() != target_svg.resolve():
+                        if target_svg.exists(): target_svg.unlink()
+                        svg.rename(target_svg)
+
+                    layer_svgs.append(target_svg)
+                    found_layers.append(matched_layer)
+                else:
+                    job['logs'].append(f"Could not match PCB SVG: {leaf}")
+
+            # A layer can match twice (F.Cu / F_Cu); colorize its file once
+            layer_svgs = list(dict.fromkeys(layer_svgs))
+            if "pcb" in mirror_kinds:
+                _colorize_svgs(_mirror_svgs(layer_svgs, mirror_dir / "pcb"), mirror_color)
+            _colorize_svgs(layer_svgs, color)
+
+            if is_new:
+                layers = sorted(list(set(found_layers)))
+                with manifest_lock:
+                    manifest["layers"] = layers
+                job['logs'].append(f"Populated manifest with {len(layers)} layers")
+        else:
+            job['logs'].append(f"PCB Export FAILED (Code {res.returncode})")
+            job['logs'].append(f"STDERR: {res.stderr}")
 
 def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: str):
     """Execute diff generation in background."""
-    job = diff_jobs[job_id]
+    with _jobs_lock:
+        job = diff_jobs[job_id]
     
     try:
         # 1. Setup paths
@@ -218,7 +518,7 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
             raise ValueError(f"Project '{project_id}' not found")
             
         project_path = Path(project.path)
-        job_dir = (Path("/tmp/prism_diff") / job_id).resolve()
+        job_dir = (DIFF_ROOT / job_id).resolve()
         job_dir.mkdir(parents=True, exist_ok=True)
         job['abs_output_path'] = str(job_dir)
         
@@ -244,16 +544,9 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
                     job['logs'].append(f"Warning: Failed to parse .prism.json: {e}")
             return {}
 
-        # 1. Snapshot commits
+        # 1. Snapshot and export both commits
         c1_dir = job_dir / commit1
         c2_dir = job_dir / commit2
-        
-        job['logs'].append(f"Snapshotting commit {commit1}...")
-        _snapshot_commit(project_path, commit1, c1_dir)
-        
-        job['logs'].append(f"Snapshotting commit {commit2}...")
-        _snapshot_commit(project_path, commit2, c2_dir)
-
 
         # We need to process both commits to ensure we catch files present in one but not other?
         # For simplicity, we scan both, but usually we iterate over the "New" structure 
@@ -265,97 +558,34 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
         COLOR_NEW = "#00AA00" # Slightly darker green for visibility on white
         COLOR_OLD = "#FF0000"
         
-        for commit, directory, color in [(commit1, c1_dir, COLOR_NEW), (commit2, c2_dir, COLOR_OLD)]:
-            # 1. Locate design files
-            sch_file = next(directory.rglob("*.kicad_sch"), None)
-            pcb_file = next(directory.rglob("*.kicad_pcb"), None)
-            
-            # 2. Export Schematics
-            if sch_file:
-                sch_out_dir = directory / "sch"
-                sch_out_dir.mkdir(exist_ok=True)
-                job['logs'].append(f"Exporting Schematics for {commit}...")
-                
-                cmd = [
-                    CLI_CMD, "sch", "export", "svg",
-                    "--black-and-white",
-                    "--output", str(sch_out_dir),
-                    str(sch_file)
-                ]
-                job['logs'].append(f"SCH CMD: {' '.join(cmd)}")
-                res = subprocess.run(cmd, capture_output=True, text=True)
-                
-                if res.returncode == 0:
-                    found_svgs = list(sch_out_dir.glob("*.svg"))
-                    for svg in found_svgs:
-                        _colorize_svg(svg, color)
-                    
-                    if commit == commit1:
-                        manifest["schematic"] = True
-                        manifest["sheets"] = sorted([f.name for f in found_svgs])
-                else:
-                    job['logs'].append(f"SCH Export FAILED (Code {res.returncode})")
-            
-            # 3. Export PCB Layers
-            if pcb_file:
-                pcb_out_dir = directory / "pcb"
-                pcb_out_dir.mkdir(exist_ok=True)
-                job['logs'].append(f"Exporting PCB Layers for {commit} from {pcb_file}...")
-                
-                # We export standard layers in one shot using --mode-multi
-                all_layers = _get_pcb_layers(pcb_file)
-                cmd = [
-                    CLI_CMD, "pcb", "export", "svg",
-                    "--mode-multi",
-                    "--layers", ",".join(all_layers),
-                    "--black-and-white",
-                    "--exclude-drawing-sheet",
-                    "--page-size-mode", "2",
-                    "--output", str(pcb_out_dir),
-                    str(pcb_file)
+        # Where a commit pair has identical export inputs, kicad-cli runs
+        # once for the new commit and its SVGs are copied for the old one
+        tree1 = _list_tree(project_path, commit1)
+        tree2 = _list_tree(project_path, commit2)
+        shared = frozenset()
+        if c1_dir != c2_dir:
+            shared = frozenset(
+                kind for kind, suffixes, design_suffix in [
+                    ("sch", SCH_INPUT_SUFFIXES, ".kicad_sch"),
+                    ("pcb", PCB_INPUT_SUFFIXES, ".kicad_pcb"),
                 ]
-                job['logs'].append(f"PCB CMD: {' '.join(cmd)}")
-                res = subprocess.run(cmd, capture_output=True, text=True)
-                
-                if res.returncode == 0:
-                    # KiCad names these {project}-{layer}.svg or just {layer}.svg
-                    # We normalize them to {layer_name}.svg for the frontend
-                    found_layers = []
-                    job['logs'].append(f"PCB Export success. Dir content: {list(pcb_out_dir.glob('*.svg'))}")
-                    
-                    for svg in list(pcb_out_dir.glob("*.svg")):
-                        leaf = svg.name
-                        layer_part = leaf
-                        if leaf.startswith(pcb_file.stem + "-"):
-                            layer_part = leaf[len(pcb_file.stem)+1:]
-                        
-                        # Match back to the original layer name to ensure F.Cu vs F_Cu consistency
-                        matched_layer = None
-                        for l in all_layers:
-                            if l.replace(".", "_") == layer_part.replace(".svg", ""):
-                                matched_layer = l
-                                break
-                        
-                        if matched_layer:
-                            target_svg = pcb_out_dir / (matched_layer.replace(".", "_") + ".svg")
-                            job['logs'].append(f"Matched {leaf} -> {matched_layer} (Target: {target_svg.name})")
-                            if svg.resolve() != target_svg.resolve():
-                                if target_svg.exists(): target_svg.unlink()
-                                svg.rename(target_svg)
-                            
-                            _colorize_svg(target_svg, color)
-                            found_layers.append(matched_layer)
-                        else:
-                            job['logs'].append(f"Could not match PCB SVG: {leaf}")
-                    
-                    if commit == commit1:
-                        manifest["layers"] = sorted(list(set(found_layers)))
-                        job['logs'].append(f"Populated manifest with {len(manifest['layers'])} layers")
-                else:
-                    job['logs'].append(f"PCB Export FAILED (Code {res.returncode})")
-                    job['logs'].append(f"STDERR: {res.stderr}")
-            else:
-                job['logs'].append(f"No .kicad_pcb found for {commit}")
+                if _same_inputs(tree1, tree2, suffixes, design_suffix)
+            )
+
+        # The two commits are independent snapshot + kicad-cli workloads
+        # (unless both name the same commit, which shares one directory)
+        manifest_lock = threading.Lock()
+        workers = 1 if c1_dir == c2_dir else 2
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"diff-{job_id[:8]}") as pool:
+            futures = [
+                pool.submit(_export_commit, project_path, commit1, c1_dir, COLOR_NEW, True,
+                            job, manifest, manifest_lock, tree1,
+                            mirror=(c2_dir, COLOR_OLD, shared)),
+                pool.submit(_export_commit, project_path, commit2, c2_dir, COLOR_OLD, False,
+                            job, manifest, manifest_lock, tree2, skip=shared),
+            ]
+            for future in as_completed(futures):
+                future.result()
 
         # 4. BoM Diff
         job['logs'].append("Generating BoM Diff...")
@@ -365,7 +595,11 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
             
             bom_csvs = {}
             for commit, directory in [(commit1, c1_dir), (commit2, c2_dir)]:
-                sch_file = next(directory.rglob("*.kicad_sch"), None)
+                if commit == commit2 and "sch" in shared and commit1 in bom_csvs:
+                    # Same schematic inputs, same BoM
+                    bom_csvs[commit] = bom_csvs[commit1]
+                    continue
+                sch_file, _ = _find_design_files(directory)
                 if sch_file:
                     csv_path = directory / "bom.csv"
                     cmd = [
@@ -381,6 +615,9 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
                         job['logs'].append(f"BoM export failed for {commit}: {res.stderr}")
             
             if commit1 in bom_csvs and commit2 in bom_csvs:
+                if bom_csvs[commit1] == bom_csvs[commit2]:
+                    job['logs'].append("BoM unchanged between commits.")
+                # Memoized per content: identical CSVs yield the same parsed list
                 old_bom = bom_diff_service.parse_bom_csv(bom_csvs[commit2])
                 new_bom = bom_diff_service.parse_bom_csv(bom_csvs[commit1])
                 diff_results = bom_diff_service.diff_boms(old_bom, new_bom, bom_fields)
@@ -392,43 +629,85 @@ def _run_diff_generation(job_id: str, project_id: str, commit1: str, commit2: st
         except Exception as e:
             job['logs'].append(f"Error generating BoM diff: {e}")
 
-        # Write manifest
-        # Write logs and manifest
-        log_path = job_dir / "logs.txt"
-        log_path.write_text("\n".join(job['logs']), encoding="utf-8")
+        # Write logs and manifest, once, before the directory is published
+        job['logs'].append("Diff generation complete.")
+        (job_dir / "logs.txt").write_text("\n".join(job['logs']), encoding="utf-8")
 
-        with open(job_dir / "manifest.json", "w") as f:
-            json.dump(manifest, f, indent=2)
+        # json.dumps without indent runs the C encoder; json.dump (or any
+        # indent) walks every BoM change entry in pure Python.
+        (job_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
 
-        job['status'] = 'completed'
-        job['message'] = 'Ready'
-        job['percent'] = 100
-        job['logs'].append("Diff generation complete.")
-        log_path.write_text("\n".join(job['logs']), encoding="utf-8")
+        # Publish into the cache with an atomic rename; if a concurrent job
+        # for the same pair got there first, keep serving our own copy.
+        cache_dir = _diff_cache_dir(project_id, commit1, commit2)
+        cached = False
+        if cache_dir:
+            try:
+                cache_dir.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(job_dir, cache_dir)
+                job_dir = cache_dir
+                cached = True
+            except OSError:
+                pass
+
+        # Readers must never see 'completed' with the pre-rename path
+        with _jobs_lock:
+            job['abs_output_path'] = str(job_dir)
+            job['cached'] = cached
+            job['status'] = 'completed'
+            job['message'] = 'Ready'
+            job['percent'] = 100
 
     except Exception as e:
-        job['status'] = 'failed'
-        job['error'] = str(e)
+        with _jobs_lock:
+            job['status'] = 'failed'
+            job['error'] = str(e)
         job['logs'].append(f"Critical Error: {str(e)}")
         if 'job_dir' in locals() and job_dir.exists():
             (job_dir / "logs.txt").write_text("\n".join(job['logs']), encoding="utf-8")
 
 
 def start_diff_job(project_id: str, commit1: str, commit2: str) -> str:
-    """Start async diff job."""
+    """Start async diff job, or reuse the cached result for this commit pair."""
     job_id = str(uuid.uuid4())
-    diff_jobs[job_id] = {
-        "status": "running",
-        "message": "Initializing...",
-        "percent": 0,
-        "created_at": time.time(),
-        "project_id": project_id,
-        "commit1": commit1,
-        "commit2": commit2,
-        "logs": [],
-        "error": None,
-        "abs_output_path": None
-    }
+
+    _prune_diff_cache()
+    cache_dir = _diff_cache_dir(project_id, commit1, commit2)
+    if cache_dir and (cache_dir / "manifest.json").exists():
+        try:
+            os.utime(cache_dir)  # Keep recently viewed diffs from being pruned
+        except OSError:
+            pass
+        with _jobs_lock:
+            diff_jobs[job_id] = {
+                "status": "completed",
+                "message": "Ready",
+                "percent": 100,
+                "created_at": time.time(),
+                "project_id": project_id,
+                "commit1": commit1,
+                "commit2": commit2,
+                "logs": [f"Reusing cached diff from {cache_dir}"],
+                "error": None,
+                "abs_output_path": str(cache_dir),
+                "cached": True
+            }
+        return job_id
+
+    with _jobs_lock:
+        diff_jobs[job_id] = {
+            "status": "running",
+            "message": "Initializing...",
+            "percent": 0,
+            "created_at": time.time(),
+            "project_id": project_id,
+            "commit1": commit1,
+            "commit2": commit2,
+            "logs": [],
+            "error": None,
+            "abs_output_path": None,
+            "cached": False
+        }
     
     thread = threading.Thread(
         target=_run_diff_generation,
@@ -439,26 +718,44 @@ def start_diff_job(project_id: str, commit1: str, commit2: str) -> str:
     
     return job_id
 
-def get_job_status(job_id: str) -> Optional[dict]:
-    return diff_jobs.get(job_id)
+def _completed_output(job_id: str) -> Optional[Path]:
+    """Output directory of a completed job, read under the jobs lock."""
+    with _jobs_lock:
+        job = diff_jobs.get(job_id)
+        if not job or job['status'] != 'completed':
+            return None
+        return Path(job['abs_output_path'])
 
-def get_manifest(job_id: str):
-    job = diff_jobs.get(job_id)
-    if not job or job['status'] != 'completed':
+def get_job_status(job_id: str) -> Optional[dict]:
+    # Snapshot so the response is not serialized while the worker mutates it
+    with _jobs_lock:
+        job = diff_jobs.get(job_id)
+        return dict(job, logs=list(job['logs'])) if job else None
+
+def get_manifest_path(job_id: str) -> Optional[Path]:
+    root = _completed_output(job_id)
+    if root is None:
         return None
     
-    path = Path(job['abs_output_path']) / "manifest.json"
-    if path.exists():
+    path = root / "manifest.json"
+    return path if path.exists() else None
+
+def get_manifest(job_id: str, include_unchanged: bool = True):
+    path = get_manifest_path(job_id)
+    if path:
         with open(path, 'r') as f:
-            return json.load(f)
+            manifest = json.load(f)
+        bom = manifest.get("bom")
+        if not include_unchanged and bom:
+            bom["changes"] = [c for c in bom["changes"] if c["status"] != "unchanged"]
+        return manifest
     return None
 
 def get_asset_path(job_id: str, asset_path: str) -> Optional[Path]:
-    job = diff_jobs.get(job_id)
-    if not job or job['status'] != 'completed':
+    root = _completed_output(job_id)
+    if root is None:
         return None
         
-    root = Path(job['abs_output_path'])
     full_path = root / asset_path
     
     # Security check
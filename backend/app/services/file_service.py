@@ -18,45 +18,70 @@ def get_files_recursive(directory: str, base_path: str = "") -> List[FileItem]:
     
     Args:
         directory: Absolute path to directory
-        base_path: Relative path from output folder root (for recursion)
+        base_path: Relative path prefix for the returned items
     """
     items = []
     
     if not os.path.exists(directory):
         return items
     
+    # Stack of open directory iterators: same pre-order as recursing
+    # (a folder, then its contents) without a Python frame per level
     try:
-        for entry in os.scandir(directory):
-            # Skip hidden files and .DS_Store
-            if entry.name.startswith('.'):
-                continue
-                
-            rel_path = os.path.join(base_path, entry.name) if base_path else entry.name
-            
-            if entry.is_dir():
-                items.append(FileItem(
-                    name=entry.name,
-                    path=rel_path,
-                    size=0,
-                    modified_date=datetime.fromtimestamp(entry.stat().st_mtime).isoformat(),
-                    type="folder",
-                    is_dir=True
-                ))
-                # Recursively add subdirectory contents
-                items.extend(get_files_recursive(entry.path, rel_path))
-            else:
-                # Get file extension
-                ext = os.path.splitext(entry.name)[1].lstrip('.')
-                items.append(FileItem(
-                    name=entry.name,
-                    path=rel_path,
-                    size=entry.stat().st_size,
-                    modified_date=datetime.fromtimestamp(entry.stat().st_mtime).isoformat(),
-                    type=ext or "file",
-                    is_dir=False
-                ))
+        stack = [(os.scandir(directory), base_path)]
     except PermissionError:
-        pass
+        return items
+
+    try:
+        while stack:
+            entries, base = stack[-1]
+            try:
+                entry = next(entries, None)
+                if entry is None:
+                    entries.close()
+                    stack.pop()
+                    continue
+
+                # Skip hidden files and .DS_Store
+                if entry.name.startswith('.'):
+                    continue
+
+                rel_path = os.path.join(base, entry.name) if base else entry.name
+                st = entry.stat()
+                modified_date = datetime.fromtimestamp(st.st_mtime).isoformat()
+
+                if entry.is_dir():
+                    items.append(FileItem(
+                        name=entry.name,
+                        path=rel_path,
+                        size=0,
+                        modified_date=modified_date,
+                        type="folder",
+                        is_dir=True
+                    ))
+                    # Descend into the subdirectory next
+                    try:
+                        stack.append((os.scandir(entry.path), rel_path))
+                    except PermissionError:
+                        pass
+                else:
+                    # Get file extension
+                    ext = os.path.splitext(entry.name)[1].lstrip('.')
+                    items.append(FileItem(
+                        name=entry.name,
+                        path=rel_path,
+                        size=st.st_size,
+                        modified_date=modified_date,
+                        type=ext or "file",
+                        is_dir=False
+                    ))
+            except PermissionError:
+                # Unreadable entry: stop listing this directory
+                entries.close()
+                stack.pop()
+    finally:
+        for entries, _ in stack:
+            entries.close()
         
     return items
 
@@ -12,7 +12,7 @@ import json
 import os
 import shutil
 import uuid
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
@@ -106,14 +106,37 @@ def _normalize_name(name: str) -> str:
     return normalized
 
 
+# Last parsed folders file: ((path, mtime_ns, size), folders). Callers
+# mutate what _load_folders returns, so they always get copies.
+_folders_cache: Optional[Tuple[Tuple[str, int, int], Dict[str, Folder]]] = None
+
+
+def _file_stamp(path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _copy_folders(folders: Dict[str, Folder]) -> Dict[str, Folder]:
+    return {folder_id: folder.model_copy() for folder_id, folder in folders.items()}
+
+
 def _load_folders() -> Dict[str, Folder]:
+    global _folders_cache
     _ensure_canonical_folders_file()
 
     for path in _existing_folders_file_candidates():
+        stamp = _file_stamp(path)
+        if stamp is not None and _folders_cache is not None and _folders_cache[0] == stamp:
+            return _copy_folders(_folders_cache[1])
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                raw = json.load(f)
+            # json.loads takes the bytes directly; no text-mode decode layer
+            with open(path, "rb") as f:
+                raw = json.loads(f.read())
             folders = {folder_id: Folder(**payload) for folder_id, payload in raw.items()}
+            _folders_cache = (stamp, _copy_folders(folders))
 
             # If loaded from a legacy location, persist into canonical path once.
             if path != FOLDERS_FILE and not os.path.exists(FOLDERS_FILE):
@@ -127,16 +150,22 @@ def _load_folders() -> Dict[str, Folder]:
 
 
 def _save_folders(folders: Dict[str, Folder]) -> None:
-    with open(FOLDERS_FILE, "w", encoding="utf-8") as f:
-        json.dump({k: v.dict() for k, v in folders.items()}, f, indent=2)
+    global _folders_cache
+    # Serialize up front and write once; json.dump streams many small
+    # chunks into the file object.
+    payload = json.dumps({k: v.model_dump() for k, v in folders.items()}, indent=2)
+    with open(FOLDERS_FILE, "wb") as f:
+        f.write(payload.encode("utf-8"))
+    # What was just written is the new cached state; no re-parse needed
+    _folders_cache = (_file_stamp(FOLDERS_FILE), _copy_folders(folders))
 
 
 def _children_map(folders: Dict[str, Folder]) -> Dict[Optional[str], List[str]]:
+    # Sort once by lowercased name, then bucket in a single pass; buckets
+    # inherit the sorted order.
     children: Dict[Optional[str], List[str]] = {}
-    for folder in folders.values():
+    for folder in sorted(folders.values(), key=lambda folder: folder.name.lower()):
         children.setdefault(folder.parent_id, []).append(folder.id)
-    for folder_ids in children.values():
-        folder_ids.sort(key=lambda folder_id: folders[folder_id].name.lower())
     return children
 
 
@@ -154,12 +183,12 @@ def _descendant_ids(root_folder_id: str, children: Dict[Optional[str], List[str]
     return descendants
 
 
-def _project_ids_by_folder(folders: Dict[str, Folder]) -> Dict[str, List[str]]:
-    by_folder: Dict[str, List[str]] = {folder_id: [] for folder_id in folders.keys()}
-    for project in project_service.get_registered_projects():
-        if project.folder_id and project.folder_id in by_folder:
-            by_folder[project.folder_id].append(project.id)
-    return by_folder
+def _project_counts_by_folder(folders: Dict[str, Folder]) -> Dict[str, int]:
+    return {
+        folder_id: len(projects)
+        for folder_id, projects in project_service.get_projects_by_folder().items()
+        if folder_id in folders
+    }
 
 
 def get_folder_tree() -> List[FolderTreeItem]:
@@ -168,48 +197,42 @@ def get_folder_tree() -> List[FolderTreeItem]:
         return []
 
     children = _children_map(folders)
-    direct_project_ids = _project_ids_by_folder(folders)
-    total_cache: Dict[str, int] = {}
-
-    def total_count(folder_id: str, visiting: Optional[set] = None) -> int:
-        active_stack = visiting or set()
-        if folder_id in active_stack:
-            # Malformed data guard: break recursion on cycles.
-            return len(direct_project_ids.get(folder_id, []))
-        if folder_id in total_cache:
-            return total_cache[folder_id]
-        count = len(direct_project_ids.get(folder_id, []))
-        active_stack.add(folder_id)
-        for child_id in children.get(folder_id, []):
-            count += total_count(child_id, active_stack)
-        active_stack.remove(folder_id)
-        total_cache[folder_id] = count
-        return count
+    direct_counts = _project_counts_by_folder(folders)
 
-    tree_items: List[FolderTreeItem] = []
+    # Pre-order walk from the root folders. Reachable folders form a forest
+    # (one parent each); `seen` still guards against malformed cycles.
+    order: List[Tuple[str, int]] = []
+    seen = set()
+    stack = [(folder_id, 0) for folder_id in reversed(children.get(None, []))]
+    while stack:
+        folder_id, depth = stack.pop()
+        if folder_id in seen:
+            continue
+        seen.add(folder_id)
+        order.append((folder_id, depth))
+        stack.extend((child_id, depth + 1) for child_id in reversed(children.get(folder_id, [])))
 
-    def walk(parent_id: Optional[str], depth: int, visiting: Optional[set] = None) -> None:
-        active_stack = visiting or set()
-        for folder_id in children.get(parent_id, []):
-            if folder_id in active_stack:
-                continue
-            active_stack.add(folder_id)
-            folder = folders[folder_id]
-            tree_items.append(
-                FolderTreeItem(
-                    id=folder.id,
-                    name=folder.name,
-                    parent_id=folder.parent_id,
-                    depth=depth,
-                    has_children=folder_id in children,
-                    direct_project_count=len(direct_project_ids.get(folder_id, [])),
-                    total_project_count=total_count(folder_id),
-                )
-            )
-            walk(folder_id, depth + 1, active_stack)
-            active_stack.remove(folder_id)
+    # Children come after their parent in pre-order, so a reverse pass sums bottom-up.
+    total_counts: Dict[str, int] = {}
+    for folder_id, _ in reversed(order):
+        total_counts[folder_id] = direct_counts.get(folder_id, 0) + sum(
+            total_counts.get(child_id, 0) for child_id in children.get(folder_id, [])
+        )
 
-    walk(None, 0)
+    tree_items: List[FolderTreeItem] = []
+    for folder_id, depth in order:
+        folder = folders[folder_id]
+        tree_items.append(
+            FolderTreeItem(
+                id=folder.id,
+                name=folder.name,
+                parent_id=folder.parent_id,
+                depth=depth,
+                has_children=folder_id in children,
+                direct_project_count=direct_counts.get(folder_id, 0),
+                total_project_count=total_counts[folder_id],
+            )
+        )
     return tree_items
 
 
@@ -283,15 +306,20 @@ def delete_folder(folder_id: str, cascade: bool = True) -> bool:
         return False
 
     children = _children_map(folders)
-    delete_ids = _descendant_ids(folder_id, children) if cascade else [folder_id]
-
     if not cascade and folder_id in children:
         raise ValueError("Folder has subfolders. Use cascade delete or move subfolders first.")
 
+    delete_ids = set(_descendant_ids(folder_id, children)) if cascade else {folder_id}
+
     # Move all projects under deleted folders back to root.
-    for project in project_service.get_registered_projects():
-        if project.folder_id in delete_ids:
-            project_service.update_project_folder_id(project.id, None)
+    projects_by_folder = project_service.get_projects_by_folder()
+    reassign = {
+        project.id: None
+        for delete_id in delete_ids
+        for project in projects_by_folder.get(delete_id, [])
+    }
+    if reassign:
+        project_service.update_project_folder_ids(reassign)
 
     for delete_id in delete_ids:
         folders.pop(delete_id, None)
@@ -317,11 +345,13 @@ def get_folder_contents(folder_id: Optional[str]) -> dict:
         key=lambda folder: folder.name.lower(),
     )
     projects = sorted(
-        [project for project in project_service.get_registered_projects() if project.folder_id == folder_id],
+        project_service.get_projects_by_folder().get(folder_id, []),
         key=lambda project: (project.display_name or project.name).lower(),
     )
 
+    # Hand back the model instances; the router wraps them without a
+    # dict round-trip and re-validation.
     return {
-        "folders": [folder.dict() for folder in children],
-        "projects": [project.dict() for project in projects],
+        "folders": children,
+        "projects": projects,
     }
@@ -1,9 +1,17 @@
+import asyncio
 import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from fastapi import APIRouter, HTTPException
 from git import Repo
-from typing import List, Dict, Any
+from git.exc import BadName, BadObject, NoSuchPathError
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pydantic import BaseModel
-import datetime
+import time
 
 router = APIRouter()
 
@@ -18,87 +26,151 @@ class CommitInfo(BaseModel):
     date: str
 
 
+# One record per commit: fields split by US (0x1f), records started by RS (0x1e)
+_LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%cd%x1f%B"
+# Committer date as local-time ISO 8601 (no offset), formatted by git
+_LOG_DATE = "--date=format-local:%Y-%m-%dT%H:%M:%S"
+
+
+def _tree_path(path: Optional[str]) -> Optional[str]:
+    """
+    Normalize a repo-relative path once for git (tree lookups, pathspecs,
+    cache keys): no leading, trailing or doubled slashes and no "." parts.
+    None for the repository root.
+    """
+    if not path:
+        return None
+    return '/'.join(part for part in path.split('/') if part and part != '.') or None
+
+
+def _iso_date(timestamp: int) -> str:
+    """Local-time ISO 8601 without offset, like datetime.fromtimestamp(timestamp).isoformat()."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp))
+
+
+def _log_commits(repo: Repo, max_count: int, path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Walk history with a single `git log`, instead of loading each commit
+    through GitPython objects.
+    With path, only commits that changed something under it are returned;
+    git does the filtering with its pathspec tree-diff machinery.
+    """
+    args = [f'--max-count={max_count}', f'--format={_LOG_FORMAT}', _LOG_DATE]
+    if path:
+        args += ['--', path]
+    output = repo.git(literal_pathspecs=True).log(*args)
+
+    commits = []
+    for record in output.split('\x1e')[1:]:
+        hexsha, author, email, committed, message = record.split('\x1f', 4)
+        commits.append({
+            "hash": hexsha[:7],
+            "full_hash": hexsha,
+            "author": author,
+            "email": email,
+            "date": committed,
+            "message": message.strip()
+        })
+    return commits
+
+
 def get_commits_list_filtered(repo_path: str, relative_path: str = None, limit: int = 50):
     """
     Get list of commits from repository, optionally filtered to a subdirectory.
     For Type-2 projects, relative_path scopes commits to the subproject.
     """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
     try:
-        repo = Repo(repo_path)
-        commits = []
-        
-        for commit in repo.iter_commits(max_count=limit * 3):  # Fetch more to account for filtering
-            # If relative_path provided, filter to commits that touched files under that path
-            if relative_path:
-                # Use diff to get changed files - more reliable than stats
-                changed_files = []
-                if commit.parents:
-                    # Compare with parent to get changed files
-                    diff = commit.parents[0].diff(commit)
-                    changed_files = [d.a_path or d.b_path for d in diff if d.a_path or d.b_path]
-                else:
-                    # Initial commit - list all files in tree
-                    changed_files = [item.path for item in commit.tree.traverse() if item.type == 'blob']
-                
-                # Check if any file starts with the relative_path
-                if not any(f.startswith(relative_path) for f in changed_files):
-                    continue
-            
-            commits.append({
-                "hash": commit.hexsha[:7],
-                "full_hash": commit.hexsha,
-                "author": commit.author.name,
-                "email": commit.author.email,
-                "date": datetime.datetime.fromtimestamp(commit.committed_date).isoformat(),
-                "message": commit.message.strip()
-            })
-            
-            if len(commits) >= limit:
-                break
-                
-        return commits
+        with open_repo(repo_path) as repo:
+            return _log_commits(repo, limit, path=_tree_path(relative_path))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
 
 
+TAG_COUNT_WORKERS = 8
+
+
+def _count_tree_entries(repo_dir: str, treeish: str) -> Optional[int]:
+    """Count every entry below a tree (files and directories); None if treeish isn't a tree."""
+    try:
+        result = subprocess.run(
+            ['git', '-C', repo_dir, 'ls-tree', '-r', '-t', '-z', '--name-only', treeish],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.count(b'\0')
+
+
+# (repo realpath, counted, relative_path) -> (refs stamp, releases). Tags only
+# move when refs do, so the list is rebuilt only after a fetch/pull/tag.
+# Cached lists are shared between callers; don't mutate them.
+_releases_cache: Dict[Tuple[str, bool, Optional[str]], Tuple[tuple, List[Dict[str, Any]]]] = {}
+
+
 def get_releases_filtered(repo_path: str, relative_path: str = None):
     """
     Get list of Git tags/releases from repository.
     For Type-2 projects, shows file count under relative_path for each tag.
     """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
+    return _get_releases(repo_path, relative_path, counted=True)
+
+
+def get_releases(repo_path: str):
+    """
+    Get list of Git tags/releases from repository.
+    """
+    return _get_releases(repo_path, None, counted=False)
+
+
+def _get_releases(repo_path: str, relative_path: Optional[str], counted: bool) -> List[Dict[str, Any]]:
+    """
+    Tags, newest first. With counted, each release also gets
+    "subproject_files_changed": the entries under relative_path at that tag.
+    """
+    relative_path = _tree_path(relative_path)
     try:
-        repo = Repo(repo_path)
-        releases = []
-        for tag in repo.tags:
-            commit = tag.commit
-            
-            # Count files under relative_path if provided
-            file_count = None
-            if relative_path:
-                try:
-                    tree = commit.tree
-                    target = tree / relative_path
-                    if target.type == 'tree':
-                        file_count = len(list(target.traverse()))
-                except:
-                    pass
+        with open_repo(repo_path) as repo:
+            key = (os.path.realpath(repo_path), counted, relative_path)
+            stamp = _refs_stamp(repo.git_dir)
+            cached = _releases_cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            releases = []
+            commit_shas = []
+            for tag in repo.tags:
+                commit = tag.commit
+                commit_shas.append(commit.hexsha)
+                release = {
+                    "tag": tag.name,
+                    "commit_hash": commit.hexsha[:7],
+                    "date": _iso_date(commit.committed_date),
+                    "message": commit.message.strip()
+                }
+                if counted:
+                    release["subproject_files_changed"] = None
+                releases.append(release)
+
+            # Count files under relative_path if provided. Each count is its
+            # own git process, so the tags are counted in parallel.
+            if counted and relative_path and commit_shas:
+                treeishes = [f'{sha}:{relative_path}' for sha in commit_shas]
+                with ThreadPoolExecutor(max_workers=min(TAG_COUNT_WORKERS, len(treeishes))) as pool:
+                    counts = pool.map(_count_tree_entries, [repo.git_dir] * len(treeishes), treeishes)
+                    for release, file_count in zip(releases, counts):
+                        release["subproject_files_changed"] = file_count
             
-            releases.append({
-                "tag": tag.name,
-                "commit_hash": commit.hexsha[:7],
-                "date": datetime.datetime.fromtimestamp(commit.committed_date).isoformat(),
-                "message": commit.message.strip(),
-                "subproject_files_changed": file_count
-            })
-        # Sort by date descending (newest first)
-        releases.sort(key=lambda x: x['date'], reverse=True)
-        return releases
+            # Sort by date descending (newest first)
+            releases.sort(key=lambda x: x['date'], reverse=True)
+            _releases_cache[key] = (stamp, releases)
+            return releases
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
 
@@ -108,25 +180,11 @@ def get_file_from_commit_with_prefix(repo_path: str, commit_hash: str, file_path
     Get file content from a specific commit.
     For Type-2 projects, relative_prefix is prepended to file_path.
     """
-    try:
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
-        
-        # Prepend relative_prefix for Type-2 projects
-        full_path = file_path
-        if relative_prefix:
-            full_path = os.path.join(relative_prefix, file_path)
-        
-        try:
-            blob = commit.tree / full_path
-            content = blob.data_stream.read()
-            return content.decode('utf-8')
-        except KeyError:
-            raise HTTPException(status_code=404, detail=f"File {file_path} not found in commit")
-        except UnicodeDecodeError:
-            raise HTTPException(status_code=400, detail="Binary file cannot be decoded")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
+    # Prepend relative_prefix for Type-2 projects
+    full_path = file_path
+    if relative_prefix:
+        full_path = _tree_path(f"{relative_prefix}/{file_path}")
+    return get_file_from_commit(repo_path, commit_hash, full_path)
 
 
 def file_exists_in_commit_with_prefix(repo_path: str, commit_hash: str, file_path: str, relative_prefix: str = None) -> bool:
@@ -134,21 +192,10 @@ def file_exists_in_commit_with_prefix(repo_path: str, commit_hash: str, file_pat
     Check if a file exists in a specific commit.
     For Type-2 projects, relative_prefix is prepended to file_path.
     """
-    try:
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
-        
-        full_path = file_path
-        if relative_prefix:
-            full_path = os.path.join(relative_prefix, file_path)
-        
-        try:
-            _ = commit.tree / full_path
-            return True
-        except KeyError:
-            return False
-    except:
-        return False
+    full_path = file_path
+    if relative_prefix:
+        full_path = _tree_path(f"{relative_prefix}/{file_path}")
+    return file_exists_in_commit(repo_path, commit_hash, full_path)
 
 
 class FileContentRequest(BaseModel):
@@ -161,43 +208,20 @@ async def list_commits(repo_path: str = DEFAULT_REPO_PATH, limit: int = 50):
     """
     List commits for a given repository.
     """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
-    try:
-        repo = Repo(repo_path)
-        commits = []
-        for commit in repo.iter_commits(max_count=limit):
-            commits.append(CommitInfo(
-                hexsha=commit.hexsha,
-                message=commit.message.strip(),
-                author=commit.author.name,
-                date=datetime.datetime.fromtimestamp(commit.committed_date).isoformat()
-            ))
-        return commits
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
+    # git runs in a worker thread so the event loop keeps serving other requests
+    return await asyncio.to_thread(_list_commits, repo_path, limit)
 
-def get_releases(repo_path: str):
-    """
-    Get list of Git tags/releases from repository.
-    """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
+
+def _list_commits(repo_path: str, limit: int) -> List[Dict[str, Any]]:
     try:
-        repo = Repo(repo_path)
-        releases = []
-        for tag in repo.tags:
-            releases.append({
-                "tag": tag.name,
-                "commit_hash": tag.commit.hexsha[:7],
-                "date": datetime.datetime.fromtimestamp(tag.commit.committed_date).isoformat(),
-                "message": tag.commit.message.strip()
-            })
-        # Sort by date descending (newest first)
-        releases.sort(key=lambda x: x['date'], reverse=True)
-        return releases
+        with open_repo(repo_path) as repo:
+            # Plain dicts: response_model validates and serializes them once
+            return [
+                {"hexsha": commit["full_hash"], "message": commit["message"], "author": commit["author"], "date": commit["date"]}
+                for commit in _log_commits(repo, limit)
+            ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
 
@@ -205,84 +229,69 @@ def get_commits_list(repo_path: str, limit: int = 50):
     """
     Get list of commits from repository.
     """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
-    try:
-        repo = Repo(repo_path)
-        commits = []
-        for commit in repo.iter_commits(max_count=limit):
-            commits.append({
-                "hash": commit.hexsha[:7],
-                "full_hash": commit.hexsha,
-                "author": commit.author.name,
-                "email": commit.author.email,
-                "date": datetime.datetime.fromtimestamp(commit.committed_date).isoformat(),
-                "message": commit.message.strip()
-            })
-        return commits
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
+    return get_commits_list_filtered(repo_path, None, limit)
+
+# git's own heuristic: a NUL in the first 8000 bytes means binary
+BINARY_SNIFF_BYTES = 8000
+
+
+def _looks_binary(data: bytes) -> bool:
+    """Cheap check before decoding, so binaries skip a full failed UTF-8 decode."""
+    return data.find(b'\0', 0, BINARY_SNIFF_BYTES) != -1
+
 
 @router.get("/content")
 async def get_file_content(commit_sha: str, file_path: str, repo_path: str = DEFAULT_REPO_PATH):
     """
     Get file content from a specific commit.
     """
-    if not os.path.exists(repo_path):
-         raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
+    return await asyncio.to_thread(_read_file_content, repo_path, commit_sha, file_path)
 
-    try:
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_sha)
-        
-        try:
-            target_file = commit.tree / file_path
-            # For text files, we decode. For binaries, we might need a different strategy (e.g. base64)
-            # For now, let's assume text or try to decode utf-8
-            blob = target_file.data_stream.read()
-            return {"content": blob.decode('utf-8'), "size": target_file.size}
-        except KeyError:
-             raise HTTPException(status_code=404, detail=f"File {file_path} not found in commit {commit_sha}")
-        except UnicodeDecodeError:
-             return {"content": "Binary file (preview not available)", "size": target_file.size, "is_binary": True}
 
+def _read_file_content(repo_path: str, commit_sha: str, file_path: str) -> Dict[str, Any]:
+    try:
+        # Exactly `size` bytes from the shared cat-file process (or the blob cache)
+        blob = read_blob_at_commit(repo_path, commit_sha, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
 
+    if blob is None:
+        raise HTTPException(status_code=404, detail=f"File {file_path} not found in commit {commit_sha}")
+    if _looks_binary(blob):
+        return {"content": "Binary file (preview not available)", "size": len(blob), "is_binary": True}
+    try:
+        # For text files, we decode. For binaries, we might need a different strategy (e.g. base64)
+        # For now, let's assume text or try to decode utf-8
+        return {"content": blob.decode('utf-8'), "size": len(blob)}
+    except UnicodeDecodeError:
+        return {"content": "Binary file (preview not available)", "size": len(blob), "is_binary": True}
+
 def get_file_from_commit(repo_path: str, commit_hash: str, file_path: str) -> str:
     """
     Get file content from a specific commit.
     Returns file content as string.
     """
     try:
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
-        
-        try:
-            blob = commit.tree / file_path
-            content = blob.data_stream.read()
-            return content.decode('utf-8')
-        except KeyError:
-            raise HTTPException(status_code=404, detail=f"File {file_path} not found in commit")
-        except UnicodeDecodeError:
-            raise HTTPException(status_code=400, detail="Binary file cannot be decoded")
+        content = read_blob_at_commit(repo_path, commit_hash, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Git error: {str(e)}")
 
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"File {file_path} not found in commit")
+    if _looks_binary(content):
+        raise HTTPException(status_code=400, detail="Binary file cannot be decoded")
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Binary file cannot be decoded")
+
 def file_exists_in_commit(repo_path: str, commit_hash: str, file_path: str) -> bool:
     """
     Check if a file exists in a specific commit.
     """
     try:
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
-        try:
-            _ = commit.tree / file_path
-            return True
-        except KeyError:
-            return False
-    except:
+        return cat_file_object_type(repo_path, f"{commit_hash}:{file_path}") is not None
+    except Exception:
         return False
 
 
@@ -300,35 +309,39 @@ def sync_with_remote(repo_path: str) -> Dict[str, Any]:
         - commits_pulled: int
         - message: str
     """
-    if not os.path.exists(repo_path):
-        raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
-    
     try:
-        repo = Repo(repo_path)
-        
-        # Get current HEAD before sync
-        previous_commit = repo.head.commit.hexsha
-        
-        # Perform git pull
-        origin = repo.remotes.origin
-        
+        with open_repo(repo_path) as repo:
+            # Get current HEAD before sync
+            previous_commit = repo.head.commit.hexsha
+
         env = os.environ.copy()
         env['GIT_TERMINAL_PROMPT'] = '0'
         # Trust On First Use (TOFU) for SSH
         env['GIT_SSH_COMMAND'] = 'ssh -o StrictHostKeyChecking=accept-new'
-        
-        pull_info = origin.pull(env=env)
-        
-        # Get new HEAD after sync
-        current_commit = repo.head.commit.hexsha
-        
-        # Count how many commits were pulled
-        commits_pulled = 0
-        if previous_commit != current_commit:
-            try:
-                commits_pulled = len(list(repo.iter_commits(f'{previous_commit}..{current_commit}')))
-            except Exception:
-                commits_pulled = 1  # At least one if heads differ
+
+        # Perform git pull on a private handle: the network round trip must not
+        # hold the shared repo lock that reads of this repository wait on
+        pull_repo = Repo(repo_path)
+        try:
+            pull_repo.remotes.origin.pull(env=env)
+        finally:
+            pull_repo.close()
+
+        with open_repo(repo_path) as repo:
+            # Get new HEAD after sync
+            current_commit = repo.head.commit.hexsha
+
+            # Count how many commits were pulled
+            commits_pulled = 0
+            if previous_commit != current_commit:
+                try:
+                    commits_pulled = int(repo.git.rev_list('--count', f'{previous_commit}..{current_commit}'))
+                except Exception:
+                    commits_pulled = 1  # At least one if heads differ
+
+        # Only refs moved; blobs cached by commit SHA are still valid
+        invalidate_refs(repo_path)
+        write_commit_graph(repo_path)
         
         return {
             "success": True,
@@ -338,5 +351,410 @@ def sync_with_remote(repo_path: str) -> Dict[str, Any]:
             "message": f"Successfully pulled {commits_pulled} commit(s) from remote."
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+
+
+REPO_CACHE_SIZE = 16
+
+
+def _refs_stamp(git_dir: str) -> tuple:
+    """mtimes that change whenever HEAD, a branch or a tag moves."""
+    stamp = []
+    for name in ("HEAD", "packed-refs"):
+        try:
+            stamp.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    # Loose refs are written by renaming into their directory, which bumps
+    # only that directory's mtime: walk nested namespaces like refs/tags/release/
+    for name in ("refs/heads", "refs/tags"):
+        for dirpath, _, _ in os.walk(os.path.join(git_dir, name)):
+            try:
+                stamp.append((dirpath, os.stat(dirpath).st_mtime_ns))
+            except OSError:
+                pass
+    return tuple(stamp)
+
+
+def _packs_stamp(git_dir: str) -> Optional[tuple]:
+    """Identity of the pack directory; changes when packs are added, repacked or the repo is re-cloned."""
+    try:
+        st = os.stat(os.path.join(git_dir, "objects", "pack"))
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+class _SharedRepo:
+    """
+    A Repo kept open between requests, reopened when the repository's
+    object store is rewritten (new packs, gc, re-clone). Moving refs needs
+    no reopen: GitPython reads them from disk on every access.
+
+    GitPython talks to a long-lived `git cat-file` process per Repo and
+    caches config and pack indexes, so reusing one skips that setup.
+    Repo objects are not thread-safe: callers hold `lock` while using it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._repo: Optional[Repo] = None
+        self._stamp: Optional[tuple] = None
+        self._graph_checked = False
+
+    def get(self) -> Repo:
+        if self._repo is not None:
+            if _packs_stamp(self._repo.git_dir) == self._stamp:
+                return self._repo
+            self._close()
+        repo = Repo(self.path)
+        self._stamp = _packs_stamp(repo.git_dir)
+        self._repo = repo
+        if not self._graph_checked:
+            # Repos cloned before commit-graphs were written get one in the background
+            self._graph_checked = True
+            if not _has_commit_graph(repo.git_dir):
+                _write_commit_graph_in_background(self.path)
+        return repo
+
+    def _close(self) -> None:
+        if self._repo is not None:
+            self._repo.close()
+            self._repo = None
+            self._stamp = None
+
+    def close(self) -> None:
+        with self.lock:
+            self._close()
+
+
+# realpath -> _SharedRepo, least recently used first
+_repos: "OrderedDict[str, _SharedRepo]" = OrderedDict()
+_repos_lock = threading.Lock()
+
+
+@contextmanager
+def open_repo(repo_path: str) -> Iterator[Repo]:
+    """
+    Borrow the shared Repo for a repository, opening it on first use.
+    Other threads using the same repository wait until the block exits;
+    different repositories are used concurrently.
+    Raises HTTPException(404) if repo_path doesn't exist.
+    """
+    key = os.path.realpath(repo_path)
+    with _repos_lock:
+        shared = _repos.get(key)
+        if shared is None:
+            shared = _repos[key] = _SharedRepo(key)
+        _repos.move_to_end(key)
+        evicted = []
+        while len(_repos) > REPO_CACHE_SIZE:
+            evicted.append(_repos.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+
+    with shared.lock:
+        try:
+            repo = shared.get()
+        except Exception as e:
+            # Don't hold a slot for a path that isn't a repository
+            with _repos_lock:
+                if _repos.get(key) is shared:
+                    del _repos[key]
+            if isinstance(e, NoSuchPathError):
+                raise HTTPException(status_code=404, detail=f"Repository not found at {repo_path}")
+            raise
+        yield repo
+
+
+def invalidate_refs(repo_path: str) -> None:
+    """
+    Drop what was derived from a repository's refs (release lists), e.g.
+    after pulling into it. Caches keyed by object id (blobs) stay valid.
+    """
+    key = os.path.realpath(repo_path)
+    for cached in [k for k in list(_releases_cache) if k[0] == key]:
+        _releases_cache.pop(cached, None)
+
+
+def invalidate_repo(repo_path: str) -> None:
+    """
+    Drop the shared Repo and cat-file processes for a repository, along with
+    its ref-derived caches. Call after deleting or re-cloning it in place:
+    a running git keeps reading the deleted directory otherwise.
+    """
+    key = os.path.realpath(repo_path)
+    with _repos_lock:
+        shared = _repos.pop(key, None)
+    if shared is not None:
+        shared.close()
+    with _cat_files_lock:
+        stale = [k for k in _cat_files if os.path.realpath(k[0]) == key]
+        cat_files = [_cat_files.pop(k) for k in stale]
+    for cat_file in cat_files:
+        cat_file.close()
+    invalidate_refs(repo_path)
+
+
+def _has_commit_graph(git_dir: str) -> bool:
+    info = os.path.join(git_dir, "objects", "info")
+    return (os.path.exists(os.path.join(info, "commit-graph"))
+            or os.path.isdir(os.path.join(info, "commit-graphs")))
+
+
+def write_commit_graph(repo_path: str) -> bool:
+    """
+    Write the repository's commit-graph, with changed-path Bloom filters.
+    History walks then read parents and dates from the graph instead of
+    inflating each commit object, and subproject (path-limited) walks skip
+    commits whose filter rules the path out.
+    Best effort: returns False if git couldn't write it.
+    """
+    try:
+        result = subprocess.run(
+            ['git', '-C', repo_path, 'commit-graph', 'write', '--reachable', '--changed-paths'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+# One writer at a time: commit-graph writes are CPU and disk heavy, and
+# opening many old repos at once must not fork a git process for each
+_commit_graph_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="commit-graph")
+_commit_graph_pending: set = set()
+_commit_graph_lock = threading.Lock()
+
+
+def _write_commit_graph_in_background(repo_path: str) -> None:
+    """Queue write_commit_graph(repo_path) unless it is already queued or running."""
+    with _commit_graph_lock:
+        if repo_path in _commit_graph_pending:
+            return
+        _commit_graph_pending.add(repo_path)
+
+    def run():
+        try:
+            write_commit_graph(repo_path)
+        finally:
+            with _commit_graph_lock:
+                _commit_graph_pending.discard(repo_path)
+
+    _commit_graph_pool.submit(run)
+
+
+# Errors from a cached Repo whose on-disk objects or files changed underneath it
+_STALE_REPO_ERRORS = (NoSuchPathError, BadName, BadObject, OSError)
+
+
+def get_head_commit_date(repo_path: str) -> Optional[str]:
+    """
+    Get the committer date of HEAD, formatted like `git log -1 --format=%ci`.
+    Returns None if the repository or HEAD can't be read.
+    Safe to call from worker threads; different repos are read concurrently.
+    """
+    try:
+        with open_repo(repo_path) as repo:
+            return _format_commit_date(repo.head.commit)
+    except _STALE_REPO_ERRORS:
+        # Cached handle may have gone stale (e.g. repo re-cloned in place)
+        invalidate_repo(repo_path)
+    except Exception:
+        return None
+    try:
+        with open_repo(repo_path) as repo:
+            return _format_commit_date(repo.head.commit)
+    except Exception:
+        return None
+
+
+def _format_commit_date(commit) -> str:
+    return commit.committed_datetime.strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+class CatFileClosedError(RuntimeError):
+    """Raised by a GitCatFileBatch that was closed (evicted or invalidated) while borrowed."""
+
+
+class GitCatFileBatch:
+    """
+    A long-lived `git cat-file --batch` process for one repository.
+
+    Blob reads are written to its stdin and answered on stdout, so repeated
+    reads skip the fork/exec and object-database setup of a fresh git call.
+    Requests are serialized with a lock; the process is restarted if it dies,
+    but never after close(): callers then need a fresh one from get_cat_file().
+
+    With check=True it runs `--batch-check` instead, which answers with the
+    object header only: enough for existence probes, without reading blobs.
+    """
+
+    def __init__(self, repo_path: str, check: bool = False):
+        self.repo_path = repo_path
+        self.check = check
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._closed = False
+
+    def _start(self) -> subprocess.Popen:
+        if self._closed:
+            raise CatFileClosedError(self.repo_path)
+        if self._proc is None or self._proc.poll() is not None:
+            mode = '--batch-check' if self.check else '--batch'
+            self._proc = subprocess.Popen(
+                ['git', '-C', self.repo_path, 'cat-file', mode],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def _request(self, rev: str) -> Optional[bytes]:
+        proc = self._start()
+        proc.stdin.write(rev.encode('utf-8') + b'\n')
+        proc.stdin.flush()
+
+        header = proc.stdout.readline()
+        if not header:
+            raise BrokenPipeError("git cat-file exited")
+        if header.endswith((b' missing\n', b' ambiguous\n')):
+            # "<rev> missing" / "<rev> ambiguous"; rev itself may contain spaces
+            return None
+        # "<object id> <type> <size>"
+        parts = header.rsplit(b' ', 2)
+        if len(parts) != 3:
+            return None
+        if self.check:
+            # Object type; there is no payload to read
+            return parts[1]
+
+        size = int(parts[2])
+        data = proc.stdout.read(size)
+        proc.stdout.read(1)  # trailing LF
+        if len(data) != size:
+            raise BrokenPipeError("git cat-file exited")
+        return data if parts[1] == b'blob' else None
+
+    def read_blob(self, rev: str) -> Optional[bytes]:
+        """Read the blob named by `<commit>:<path>`; None if it doesn't exist or isn't a blob."""
+        return self._call(rev)
+
+    def object_type(self, rev: str) -> Optional[str]:
+        """Type of the object named by rev (check mode); None if it doesn't exist."""
+        kind = self._call(rev)
+        return kind.decode('ascii') if kind is not None else None
+
+    def _call(self, rev: str) -> Optional[bytes]:
+        if '\n' in rev:
+            return None
+        with self._lock:
+            try:
+                return self._request(rev)
+            except (BrokenPipeError, OSError):
+                # Process died (repo re-cloned, killed, ...); restart once
+                self._close()
+                return self._request(rev)
+
+    def _close(self) -> None:
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except Exception:
+                self._proc.kill()
+            self._proc = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._close()
+
+
+CAT_FILE_MAX_PROCESSES = 16
+
+# (repo_path, check) -> GitCatFileBatch, least recently used first
+_cat_files: "OrderedDict[Tuple[str, bool], GitCatFileBatch]" = OrderedDict()
+_cat_files_lock = threading.Lock()
+
+
+def get_cat_file(repo_path: str, check: bool = False) -> GitCatFileBatch:
+    """Get the shared cat-file process (--batch, or --batch-check) for a repository, starting one if needed."""
+    key = (repo_path, check)
+    with _cat_files_lock:
+        cat_file = _cat_files.get(key)
+        if cat_file is None:
+            cat_file = _cat_files[key] = GitCatFileBatch(repo_path, check)
+        _cat_files.move_to_end(key)
+        evicted = []
+        while len(_cat_files) > CAT_FILE_MAX_PROCESSES:
+            evicted.append(_cat_files.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+    return cat_file
+
+
+def _cat_file_call(repo_path: str, check: bool, call):
+    """Run call(cat_file) on the pooled process, retrying once if it was closed under us."""
+    try:
+        return call(get_cat_file(repo_path, check))
+    except CatFileClosedError:
+        return call(get_cat_file(repo_path, check))
+
+
+def cat_file_read_blob(repo_path: str, rev: str) -> Optional[bytes]:
+    """Read the blob named by rev through the repository's shared cat-file process."""
+    return _cat_file_call(repo_path, False, lambda cat_file: cat_file.read_blob(rev))
+
+
+def cat_file_object_type(repo_path: str, rev: str) -> Optional[str]:
+    """Type of the object named by rev, via the shared --batch-check process; None if missing."""
+    return _cat_file_call(repo_path, True, lambda cat_file: cat_file.object_type(rev))
+
+
+BLOB_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Larger blobs are read through without evicting everything else
+BLOB_CACHE_MAX_BLOB_BYTES = 16 * 1024 * 1024
+
+_FULL_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+# (repo realpath, commit sha, path) -> blob, least recently used first.
+# Only full commit SHAs are cached: unlike a ref, what they name never changes,
+# so entries are never invalidated, only evicted.
+_blob_cache: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+_blob_cache_bytes = 0
+_blob_cache_lock = threading.Lock()
+
+
+def read_blob_at_commit(repo_path: str, commit_hash: str, file_path: str) -> Optional[bytes]:
+    """
+    Read file_path as of commit_hash; None if it doesn't exist there.
+    Blobs named by a full commit SHA are served from a size-bounded LRU.
+    """
+    global _blob_cache_bytes
+    if not _FULL_SHA_RE.fullmatch(commit_hash):
+        return cat_file_read_blob(repo_path, f"{commit_hash}:{file_path}")
+
+    key = (os.path.realpath(repo_path), commit_hash, file_path)
+    with _blob_cache_lock:
+        content = _blob_cache.get(key)
+        if content is not None:
+            _blob_cache.move_to_end(key)
+            return content
+
+    content = cat_file_read_blob(repo_path, f"{commit_hash}:{file_path}")
+    if content is None or len(content) > BLOB_CACHE_MAX_BLOB_BYTES:
+        return content
+
+    with _blob_cache_lock:
+        if key not in _blob_cache:
+            _blob_cache[key] = content
+            _blob_cache_bytes += len(content)
+            while _blob_cache_bytes > BLOB_CACHE_MAX_BYTES:
+                _blob_cache_bytes -= len(_blob_cache.popitem(last=False)[1])
+    return content
@@ -10,6 +10,9 @@ Provides flexible folder mapping for KiCAD projects, supporting:
 import os
 import json
 import fnmatch
+import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 from dataclasses import dataclass, asdict
@@ -120,6 +123,9 @@ class ResolvedPaths(BaseModel):
 # Cache for project configurations
 _config_cache: Dict[str, Dict[str, Any]] = {}
 
+# Serializes .prism.json read-modify-write in save_path_config
+_save_lock = threading.Lock()
+
 
 def _normalize_optional_string(value: Any) -> Any:
     """Normalize optional string values: blank strings are treated as unset."""
@@ -140,38 +146,54 @@ def _normalize_config_values(config: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
-def _get_prism_mtime(project_path: str) -> Optional[float]:
-    """Return .prism.json mtime to validate cached config freshness."""
-    config_path = Path(project_path) / ".prism.json"
-    if not config_path.exists():
-        return None
+def _get_prism_mtime(project_path: str) -> Optional[int]:
+    """Return .prism.json mtime (ns) to validate cached config freshness."""
     try:
-        return config_path.stat().st_mtime
+        return os.stat(os.path.join(project_path, ".prism.json")).st_mtime_ns
     except OSError:
         return None
 
 
-def _load_prism_config(project_path: str) -> Optional[Dict[str, Any]]:
-    """Load .prism.json configuration if it exists."""
-    config_path = Path(project_path) / ".prism.json"
-    if config_path.exists():
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                result = {}
-                # Handle legacy format with paths nested
-                if "paths" in config:
-                    result.update(config["paths"])
-                # Add top-level fields like project_name
-                for key, value in config.items():
-                    if key != "paths":
-                        result[key] = value
-                return result
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Warning: Failed to parse .prism.json: {e}")
+@lru_cache(maxsize=512)
+def _cache_key(project_path: str) -> str:
+    """Canonical cache key for a project path (resolving symlinks costs a syscall per component)."""
+    return str(Path(project_path).resolve())
+
+
+def _flatten_prism_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the on-disk .prism.json layout into one dict of fields."""
+    result = {}
+    # Handle legacy format with paths nested
+    if "paths" in config:
+        result.update(config["paths"])
+    # Add top-level fields like project_name
+    for key, value in config.items():
+        if key != "paths":
+            result[key] = value
+    return result
+
+
+@lru_cache(maxsize=512)
+def _parse_prism_config(config_path: str, mtime_ns: int) -> Optional[Dict[str, Any]]:
+    """Parse a .prism.json file; cached per (path, mtime) so unchanged files are parsed once."""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return _flatten_prism_config(json.load(f))
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Warning: Failed to parse .prism.json: {e}")
     return None
 
 
+def _load_prism_config(project_path: str, mtime_ns: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Load .prism.json configuration if it exists."""
+    if mtime_ns is None:
+        mtime_ns = _get_prism_mtime(project_path)
+        if mtime_ns is None:
+            return None
+    config = _parse_prism_config(os.path.join(project_path, ".prism.json"), mtime_ns)
+    return dict(config) if config is not None else None
+
+
 def _find_files_by_pattern(directory: Path, pattern: str) -> List[Path]:
     """Find files matching a glob pattern."""
     matches = []
@@ -366,7 +388,7 @@ def get_path_config(project_path: str, use_cache: bool = True) -> PathConfig:
     Returns:
         PathConfig with resolved paths
     """
-    cache_key = str(Path(project_path).resolve())
+    cache_key = _cache_key(project_path)
     prism_mtime = _get_prism_mtime(project_path)
     
     # Check cache
@@ -375,6 +397,21 @@ def get_path_config(project_path: str, use_cache: bool = True) -> PathConfig:
         if cached_entry.get("prism_mtime") == prism_mtime:
             return PathConfig(**cached_entry["config"])
 
+    detected_dict = _detect_config(project_path)
+
+    # Overlay explicit .prism.json config
+    explicit_config = (_load_prism_config(project_path, prism_mtime) if prism_mtime is not None else None) or {}
+    merged = _merge_config(detected_dict, explicit_config)
+    _config_cache[cache_key] = {
+        "config": merged.dict(),
+        "detected": detected_dict,
+        "prism_mtime": prism_mtime,
+    }
+    return merged
+
+
+def _detect_config(project_path: str) -> Dict[str, Any]:
+    """Auto-detected paths with defaults filled in, before any .prism.json overlay."""
     # 1. Auto-detect base config
     detected = detect_paths(project_path)
 
@@ -386,25 +423,20 @@ def get_path_config(project_path: str, use_cache: bool = True) -> PathConfig:
             if key != "subsheets":
                 setattr(detected, key, default_value)
 
-    detected_dict = detected.dict()
+    return detected.dict()
+
 
+def _merge_config(detected_dict: Dict[str, Any], explicit_config: Dict[str, Any]) -> PathConfig:
     # 3. Overlay explicit .prism.json config field-by-field
     # Empty path fields are treated as unset and keep auto-detected/default values.
-    explicit_config = _load_prism_config(project_path) or {}
-    explicit_config = _normalize_config_values(explicit_config)
-    for key, value in explicit_config.items():
+    merged_dict = dict(detected_dict)
+    for key, value in _normalize_config_values(explicit_config).items():
         if key in PATH_FIELDS:
             if value is not None:
-                detected_dict[key] = value
+                merged_dict[key] = value
         else:
-            detected_dict[key] = value
-
-    merged = PathConfig(**detected_dict)
-    _config_cache[cache_key] = {
-        "config": merged.dict(),
-        "prism_mtime": prism_mtime,
-    }
-    return merged
+            merged_dict[key] = value
+    return PathConfig(**merged_dict)
 
 
 def resolve_paths(project_path: str, config: Optional[PathConfig] = None) -> ResolvedPaths:
@@ -486,49 +518,78 @@ def save_path_config(project_path: str, config: PathConfig) -> None:
     """
     config_path = Path(project_path) / ".prism.json"
     
-    # Load existing config to preserve other settings
-    existing = {}
-    if config_path.exists():
+    with _save_lock:
+        # Load existing config to preserve other settings
+        existing = {}
+        if config_path.exists():
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    existing = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+        
+        # Update paths and other fields
+        config_dict = config.dict(exclude_none=True)
+        
+        # Separate paths and other fields
+        if "paths" not in existing:
+            existing["paths"] = {}
+        
+        # Path fields go under paths key
+        for field in PATH_FIELDS:
+            if field in config_dict:
+                existing["paths"][field] = config_dict[field]
+        
+        # Non-path fields go at top level
+        non_path_fields = ["project_name"]
+        for field in non_path_fields:
+            if field in config_dict:
+                existing[field] = config_dict[field]
+        
+        # Save atomically so readers never see a partial file
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                existing = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    
-    # Update paths and other fields
-    config_dict = config.dict(exclude_none=True)
-    
-    # Separate paths and other fields
-    if "paths" not in existing:
-        existing["paths"] = {}
-    
-    # Path fields go under paths key
-    for field in PATH_FIELDS:
-        if field in config_dict:
-            existing["paths"][field] = config_dict[field]
-    
-    # Non-path fields go at top level
-    non_path_fields = ["project_name"]
-    for field in non_path_fields:
-        if field in config_dict:
-            existing[field] = config_dict[field]
-    
-    # Save
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(existing, f, indent=2)
-    
-    # Config file changed; force reload on next access.
-    clear_config_cache(project_path)
+            mode = os.stat(config_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(dir=project_path, prefix=".prism.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(existing, f, indent=2)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, config_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # A rewrite within the filesystem's timestamp granularity keeps the old parse key
+        _parse_prism_config.cache_clear()
+        
+        # Config file changed; merge the saved fields into the cached entry
+        # rather than dropping it, so the next read skips detection and parsing.
+        cache_key = _cache_key(project_path)
+        cached_entry = _config_cache.get(cache_key)
+        prism_mtime = _get_prism_mtime(project_path)
+        if cached_entry is None or prism_mtime is None:
+            _config_cache.pop(cache_key, None)
+        else:
+            merged = _merge_config(cached_entry["detected"], _flatten_prism_config(existing))
+            _config_cache[cache_key] = {
+                "config": merged.dict(),
+                "detected": cached_entry["detected"],
+                "prism_mtime": prism_mtime,
+            }
 
 
 def clear_config_cache(project_path: Optional[str] = None) -> None:
     """Clear configuration cache."""
     global _config_cache
+    # Parsed files are keyed on mtime, but a rewrite within the filesystem's
+    # timestamp granularity keeps the old key, so drop parsed entries too.
+    _parse_prism_config.cache_clear()
     if project_path:
-        cache_key = str(Path(project_path).resolve())
-        _config_cache.pop(cache_key, None)
+        _config_cache.pop(_cache_key(project_path), None)
     else:
         _config_cache = {}
+        _cache_key.cache_clear()
 
 
 def validate_config(project_path: str, config: PathConfig) -> Dict[str, Any]:
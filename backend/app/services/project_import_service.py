@@ -4,6 +4,7 @@ Project Import Service for KiCAD Prism
 Handles Type-1 (single project) and Type-2 (multiple projects) imports.
 """
 import os
+import re
 import shutil
 import tempfile
 import uuid
@@ -12,7 +13,8 @@ from pathlib import Path
 from typing import List, Optional, Dict
 from dataclasses import dataclass
 from git import Repo, RemoteProgress
-from app.services import project_service, path_config_service
+from app.core.paths import SSH_DIR
+from app.services import project_service, path_config_service, git_service
 
 
 @dataclass
@@ -41,10 +43,9 @@ jobs: Dict[str, dict] = {}
 
 def has_ssh_key() -> bool:
     """Check if a default SSH key exists."""
-    ssh_dir = Path.home() / ".ssh"
     key_types = ["id_ed25519", "id_rsa"]
     for kt in key_types:
-        if (ssh_dir / kt).exists():
+        if (SSH_DIR / kt).exists():
             return True
     return False
 
@@ -68,14 +69,24 @@ class CloneProgress(RemoteProgress):
                 job['logs'].append(f"[GIT] {message}")
 
 
+EXCLUDED_DIRECTORIES = frozenset({
+    'archive', 'archived', 'old', 'backup', 'backups',
+    'obsolete', 'deprecated', 'trash', '.git', '__pycache__',
+    'node_modules', '.venv', 'venv', '.env'
+})
+
+
 def is_excluded_directory(dir_name: str) -> bool:
     """Check if directory should be excluded from project discovery."""
-    excluded = {
-        'archive', 'archived', 'old', 'backup', 'backups',
-        'obsolete', 'deprecated', 'trash', '.git', '__pycache__',
-        'node_modules', '.venv', 'venv', '.env'
-    }
-    return dir_name.lower() in excluded or dir_name.startswith('.')
+    return dir_name.startswith('.') or dir_name.lower() in EXCLUDED_DIRECTORIES
+
+
+# Matches a repo-relative POSIX path if any of its components is excluded,
+# so a whole directory path is classified in one regex call.
+_EXCLUDED_PATH_RE = re.compile(
+    r'(?:^|/)(?:\.[^/]*|' + '|'.join(sorted(map(re.escape, EXCLUDED_DIRECTORIES))) + r')(?:/|$)',
+    re.IGNORECASE,
+)
 
 
 def discover_projects_from_repo(repo: Repo) -> List[DiscoveredProject]:
@@ -93,36 +104,24 @@ def discover_projects_from_repo(repo: Repo) -> List[DiscoveredProject]:
     # Map directory -> list of filenames
     dir_map = {}
     for fpath in all_files:
-        p = Path(fpath)
-        # Handle relative path correctly (relative to repo root)
-        dir_path = p.parent.as_posix() # Use as_posix for consistency
-        filename = p.name
-        
-        if dir_path not in dir_map:
-            dir_map[dir_path] = []
-        dir_map[dir_path].append(filename)
+        dir_path, _, filename = fpath.rpartition('/')
+        dir_map.setdefault(dir_path or ".", []).append(filename)
         
     projects = []
     for dir_path, filenames in dir_map.items():
         # Skip if any part of the path is excluded
-        should_exclude = False
-        parts = dir_path.split('/')
-        if dir_path != ".":
-            for part in parts:
-                if is_excluded_directory(part):
-                    should_exclude = True
-                    break
-        if should_exclude:
+        if dir_path != "." and _EXCLUDED_PATH_RE.search(dir_path):
             continue
             
         pro_files = [f for f in filenames if f.endswith(".kicad_pro")]
+        if not pro_files:
+            continue
+        has_sch = any(f.endswith(".kicad_sch") for f in filenames)
+        has_pcb = any(f.endswith(".kicad_pcb") for f in filenames)
         for pro_file in pro_files:
-            has_sch = any(f.endswith(".kicad_sch") for f in filenames)
-            has_pcb = any(f.endswith(".kicad_pcb") for f in filenames)
-            
             projects.append(DiscoveredProject(
                 name=Path(pro_file).stem,
-                relative_path=dir_path if dir_path != "." else ".",
+                relative_path=dir_path,
                 full_path="", # No checkout path
                 has_schematic=has_sch,
                 has_pcb=has_pcb
@@ -379,6 +378,10 @@ def _run_import_job(job_id: str, repo_url: str, import_type: str,
             progress=CloneProgress(job_id),
             env=env
         )
+        # A stranded repo may have been removed and re-cloned at this path;
+        # drop handles still reading the old directory
+        git_service.invalidate_repo(str(target_path))
+        git_service.write_commit_graph(str(target_path))
         
         job['logs'].append("Clone complete. Registering projects...")
         
@@ -583,6 +586,9 @@ def sync_project(project_id: str) -> dict:
 
         # .prism.json may change during sync; clear cache so path config reloads fresh.
         path_config_service.clear_config_cache()
+        # Release lists are derived from refs, which the pull moved
+        git_service.invalidate_refs(sync_path)
+        git_service.write_commit_graph(sync_path)
         
         return {
             "status": "success",
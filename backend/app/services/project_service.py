@@ -5,7 +5,7 @@ from git import Repo, RemoteProgress
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 from fastapi.responses import FileResponse
-from app.services import path_config_service
+from app.services import path_config_service, git_service
 
 class Project(BaseModel):
     id: str
@@ -21,6 +21,7 @@ class Project(BaseModel):
     import_type: Optional[str] = None  # "type1" or "type2_subproject"
     parent_repo_path: Optional[str] = None  # Path to parent repo for Type-2
     folder_id: Optional[str] = None  # Optional folder assignment for workspace organization
+    has_thumbnail: bool = False  # Resolved when the project is loaded
 
 # PROJECTS_ROOT is where imported projects are stored.
 # In Docker, this should be a persistent volume mount.
@@ -49,6 +50,34 @@ def _load_project_registry() -> Dict[str, dict]:
             pass
     return {}
 
+# Parsed registry for read-only callers: (stamp, registry). Reparsed only when
+# the file's (mtime_ns, size) changes; mutators keep using _load_project_registry
+# so they never modify the shared copy.
+_registry_cache: tuple = (None, {})
+
+
+def _registry_stamp() -> Optional[tuple]:
+    try:
+        st = os.stat(PROJECT_REGISTRY_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_project_registry(stamp: Optional[tuple] = None) -> Dict[str, dict]:
+    """Load the project registry for reading. The result is shared; do not mutate it."""
+    global _registry_cache
+
+    if stamp is None:
+        stamp = _registry_stamp()
+    if stamp is None:
+        return {}
+    cached_stamp, registry = _registry_cache
+    if cached_stamp != stamp:
+        registry = _load_project_registry()
+        _registry_cache = (stamp, registry)
+    return registry
+
 def _save_project_registry(registry: Dict[str, dict]) -> None:
     """Save the project registry to JSON file."""
     try:
@@ -130,23 +159,31 @@ def _normalize_path(path: str) -> str:
     # Return original path if no conversion worked
     return path
 
-# Cache for registered projects
+# Cache for registered projects, valid while the registry file is unchanged.
+# The TTL bounds staleness of filesystem-derived fields (paths, mtimes, names).
 _projects_cache: List[Project] = []
 _projects_cache_time: float = 0
+_projects_cache_stamp: Optional[tuple] = None
 PROJECTS_CACHE_TTL = 5.0 # seconds
 
+def _projects_cache_valid(current_time: float, stamp: Optional[tuple]) -> bool:
+    return (bool(_projects_cache)
+            and stamp == _projects_cache_stamp
+            and (current_time - _projects_cache_time) < PROJECTS_CACHE_TTL)
+
 def get_registered_projects() -> List[Project]:
     """
     Get all registered projects from the registry.
     Uses a short-term cache to avoid excessive I/O.
     """
-    global _projects_cache, _projects_cache_time
+    global _projects_cache, _projects_cache_time, _projects_cache_stamp
     
     current_time = time.time()
-    if _projects_cache and (current_time - _projects_cache_time) < PROJECTS_CACHE_TTL:
+    stamp = _registry_stamp()
+    if _projects_cache_valid(current_time, stamp):
         return _projects_cache
         
-    registry = _load_project_registry()
+    registry = _read_project_registry(stamp)
     projects = []
     for project_id, data in registry.items():
         # Normalize path for current environment
@@ -156,50 +193,62 @@ def get_registered_projects() -> List[Project]:
         if not os.path.exists(normalized_path):
             continue
         
-        # Update last modified time
-        try:
-            mtime = os.path.getmtime(normalized_path)
-            last_modified = datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
-        except:
-            last_modified = data.get("last_modified", "Unknown")
-        
-        # Get custom display name from .prism.json
-        custom_display_name = path_config_service.get_project_display_name(normalized_path)
-        
-        projects.append(Project(
-            id=project_id,
-            name=data["name"],
-            display_name=custom_display_name,
-            description=data.get("description", f"Project {data['name']}"),
-            path=normalized_path,
-            last_modified=last_modified,
-            thumbnail_url=f"/api/projects/{project_id}/thumbnail",
-            sub_path=data.get("sub_path"),
-            parent_repo=data.get("parent_repo"),
-            repo_url=data.get("repo_url"),
-            import_type=data.get("import_type"),
-            parent_repo_path=_normalize_path(data.get("parent_repo_path")) if data.get("import_type") == "type2_subproject" else None,
-            folder_id=data.get("folder_id")
-        ))
+        projects.append(_build_project(project_id, data, normalized_path))
     
     _projects_cache = projects
     _projects_cache_time = current_time
+    _projects_cache_stamp = stamp
     return projects
 
 
+# Projects grouped by folder_id, derived from the cached project list and
+# rebuilt only when that list is replaced. Stored as (source, index) so
+# readers never see an index paired with the wrong list.
+_projects_by_folder: tuple = (None, {})
+
+
+def get_projects_by_folder() -> Dict[Optional[str], List[Project]]:
+    """Get registered projects grouped by folder_id (None is the workspace root)."""
+    global _projects_by_folder
+
+    projects = get_registered_projects()
+    source, index = _projects_by_folder
+    if source is not projects:
+        index = {}
+        for project in projects:
+            index.setdefault(project.folder_id, []).append(project)
+        _projects_by_folder = (projects, index)
+    return index
+
+
+# id -> Project for the cached project list, stored as (source, index) like
+# _projects_by_folder.
+_projects_by_id: tuple = (None, {})
+
+
+def _get_projects_by_id(projects: List[Project]) -> Dict[str, Project]:
+    global _projects_by_id
+
+    source, index = _projects_by_id
+    if source is not projects:
+        index = {project.id: project for project in projects}
+        _projects_by_id = (projects, index)
+    return index
+
+
 def get_project_by_id(project_id: str) -> Optional[Project]:
     """
     Efficiently get a single project by its ID without scanning all projects if possible.
     """
     # Try cache first
-    global _projects_cache, _projects_cache_time
     current_time = time.time()
-    if _projects_cache and (current_time - _projects_cache_time) < PROJECTS_CACHE_TTL:
-        project = next((p for p in _projects_cache if p.id == project_id), None)
+    stamp = _registry_stamp()
+    if _projects_cache_valid(current_time, stamp):
+        project = _get_projects_by_id(_projects_cache).get(project_id)
         if project:
             return project
 
-    registry = _load_project_registry()
+    registry = _read_project_registry(stamp)
     if project_id not in registry:
         return None
         
@@ -209,18 +258,24 @@ def get_project_by_id(project_id: str) -> Optional[Project]:
     if not os.path.exists(normalized_path):
         return None
         
+    return _build_project(project_id, data, normalized_path)
+
+def _build_project(project_id: str, data: dict, normalized_path: str) -> Project:
+    """Build a Project from its registry entry, resolving filesystem-derived fields once."""
+    # Update last modified time
     try:
         mtime = os.path.getmtime(normalized_path)
         last_modified = datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
     except:
         last_modified = data.get("last_modified", "Unknown")
-        
-    custom_display_name = path_config_service.get_project_display_name(normalized_path)
+    
+    # Custom display name and thumbnail come from .prism.json
+    config = path_config_service.get_path_config(normalized_path)
     
     return Project(
         id=project_id,
         name=data["name"],
-        display_name=custom_display_name,
+        display_name=config.project_name or None,
         description=data.get("description", f"Project {data['name']}"),
         path=normalized_path,
         last_modified=last_modified,
@@ -230,7 +285,8 @@ def get_project_by_id(project_id: str) -> Optional[Project]:
         repo_url=data.get("repo_url"),
         import_type=data.get("import_type"),
         parent_repo_path=_normalize_path(data.get("parent_repo_path")) if data.get("import_type") == "type2_subproject" else None,
-        folder_id=data.get("folder_id")
+        folder_id=data.get("folder_id"),
+        has_thumbnail=_find_thumbnail(normalized_path, config) is not None
     )
 
 import threading
@@ -585,39 +641,29 @@ def start_workflow_job(project_id: str, workflow_type: str, author: str = "anony
     return job_id
 
 def get_project_thumbnail_path(project_id: str) -> Optional[str]:
-    projects = get_registered_projects()
-    project = next((p for p in projects if p.id == project_id), None)
+    project = get_project_by_id(project_id)
     if not project:
-        print(f"[DEBUG] Project {project_id} not found")
         return None
-    
-    # Use path config service to get thumbnail path
-    config = path_config_service.get_path_config(project.path)
-    resolved = path_config_service.resolve_paths(project.path, config)
+    return _find_thumbnail(project.path)
+
+def _find_thumbnail(project_path: str, config: Optional[path_config_service.PathConfig] = None) -> Optional[str]:
+    """Resolve the thumbnail image for a project: the configured file, or the first image in the configured directory."""
+    resolved = path_config_service.resolve_paths(project_path, config)
     thumbnail_path = resolved.thumbnail_dir
     
-    print(f"[DEBUG] Project: {project.path}")
-    print(f"[DEBUG] Config thumbnail: {config.thumbnail}")
-    print(f"[DEBUG] Resolved thumbnail_dir: {thumbnail_path}")
-    
-    if not thumbnail_path or not os.path.exists(thumbnail_path):
-        print(f"[DEBUG] Thumbnail path does not exist or is None")
+    if not thumbnail_path:
         return None
     
     # If thumbnail path points to a specific file, return it directly
     if os.path.isfile(thumbnail_path):
-        print(f"[DEBUG] Returning specific file: {thumbnail_path}")
         return thumbnail_path
     
     # If it's a directory, find first image file
     if os.path.isdir(thumbnail_path):
         for file in os.listdir(thumbnail_path):
             if file.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                result = os.path.join(thumbnail_path, file)
-                print(f"[DEBUG] Returning file from directory: {result}")
-                return result
+                return os.path.join(thumbnail_path, file)
     
-    print(f"[DEBUG] No valid thumbnail found")
     return None
 
 def find_schematic_file(project_path: str) -> Optional[str]:
@@ -695,6 +741,7 @@ def delete_project(project_id: str) -> bool:
             if os.path.exists(parent_repo_path):
                 try:
                     shutil.rmtree(parent_repo_path)
+                    git_service.invalidate_repo(parent_repo_path)
                     print(f"Deleted Type-2 parent repo: {parent_repo_path}")
                 except Exception as e:
                     print(f"Warning: Failed to delete parent repo directory {parent_repo_path}: {e}")
@@ -702,6 +749,7 @@ def delete_project(project_id: str) -> bool:
         # For Type-1 projects (standalone), delete the directory
         try:
             shutil.rmtree(project_path)
+            git_service.invalidate_repo(project_path)
         except Exception as e:
             print(f"Warning: Failed to delete project directory {project_path}: {e}")
     
@@ -718,18 +766,52 @@ def update_project_folder_id(project_id: str, folder_id: Optional[str]) -> bool:
     Persist workspace folder assignment for a project.
     Returns False if project does not exist.
     """
+    return bool(update_project_folder_ids({project_id: folder_id}))
+
+def update_project_folder_ids(folder_ids: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Persist several folder assignments ({project_id: folder_id}) with a
+    single registry write. Returns the ids that exist in the registry.
+    """
+    previous_stamp = _registry_stamp()
     registry = _load_project_registry()
-    if project_id not in registry:
-        return False
+    found = [project_id for project_id in folder_ids if project_id in registry]
+    changed = {
+        project_id: folder_ids[project_id]
+        for project_id in found
+        if registry[project_id].get("folder_id") != folder_ids[project_id]
+    }
+    if not changed:
+        # Already there; skip the registry rewrite and cache reset.
+        return found
 
-    registry[project_id]["folder_id"] = folder_id
+    for project_id, folder_id in changed.items():
+        registry[project_id]["folder_id"] = folder_id
     _save_project_registry(registry)
 
-    # Clear projects cache so subsequent reads include updated folder_id.
-    global _projects_cache, _projects_cache_time
-    _projects_cache = []
-    _projects_cache_time = 0
-    return True
+    _patch_cached_folder_ids(changed, previous_stamp)
+    return found
+
+def _patch_cached_folder_ids(folder_ids: Dict[str, Optional[str]], previous_stamp: Optional[tuple]) -> None:
+    """
+    Apply saved folder reassignments to the cached project list instead of
+    rebuilding every project. Only done if the cache matched the registry
+    as it was before the save; otherwise the cache is cleared.
+    """
+    global _projects_cache, _projects_cache_time, _projects_cache_stamp
+
+    stamp = _registry_stamp()
+    if _projects_cache and _projects_cache_stamp == previous_stamp and stamp != previous_stamp:
+        # A new list, so the by-folder/by-id indexes are rebuilt from it
+        _projects_cache = [
+            project.model_copy(update={"folder_id": folder_ids[project.id]})
+            if project.id in folder_ids else project
+            for project in _projects_cache
+        ]
+        _projects_cache_stamp = stamp
+    else:
+        _projects_cache = []
+        _projects_cache_time = 0
 
 def get_subsheets(project_path: str, main_schematic: str) -> List[str]:
     """Find all .kicad_sch files using path config."""
@@ -737,8 +819,8 @@ def get_subsheets(project_path: str, main_schematic: str) -> List[str]:
     main_name = os.path.basename(main_schematic)
     
     # Get path config
-    resolved = path_config_service.resolve_paths(project_path)
     config = path_config_service.get_path_config(project_path)
+    resolved = path_config_service.resolve_paths(project_path, config)
     
     # Check root directory for other schematic files
     for file in os.listdir(project_path):
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from app.api import auth
+
+
+class _FakeResponse:
+    def __init__(self, status, certs=None, headers=None):
+        self.status = status
+        self.data = json.dumps(certs or {}).encode("utf-8")
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def google(monkeypatch):
+    """Stub Google's cert endpoint and start from a cold cert cache."""
+    calls = []
+
+    def request(url, method="GET", headers=None):
+        calls.append(headers or {})
+        return _FakeResponse(200, {"kid-1": "CERT-1"}, {"ETag": '"v1"', "Cache-Control": "public, max-age=600"})
+
+    monkeypatch.setattr(auth, "_REQUEST", request)
+    monkeypatch.setattr(auth, "_certs_cache", {"certs": None, "expires_at": 0.0, "fetched_at": 0.0, "etag": None})
+    return calls
+
+
+def test_cold_cache_fetches_certs(google):
+    assert auth._get_certs("kid-1") == {"kid-1": "CERT-1"}
+    assert len(google) == 1
+
+
+def test_cold_cache_with_unknown_kid_fetches_once(google):
+    assert auth._get_certs("kid-unknown") == {"kid-1": "CERT-1"}
+    # Rotation refreshes are rate limited, so an unknown kid right after a fetch doesn't refetch
+    assert auth._get_certs("kid-unknown") == {"kid-1": "CERT-1"}
+    assert len(google) == 1
+
+
+def test_cold_cache_without_kid_fetches_certs(google):
+    assert auth._get_certs(None) == {"kid-1": "CERT-1"}
+    assert auth._get_certs(None) == {"kid-1": "CERT-1"}
+    assert len(google) == 1
@@ -0,0 +1,77 @@
+import shutil
+import subprocess
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import git_service
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _make_repo(path, files):
+    for name, content in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(content)
+    _git(path, "init", "-q")
+    _git(path, "add", "-A")
+    _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A one-commit repository with spaces in its file names, like KiCad projects often have."""
+    path = tmp_path / "repo"
+    _make_repo(path, {"sub/Main Board.kicad_sch": "(kicad_sch)\n"})
+    yield str(path)
+    git_service.invalidate_repo(str(path))
+
+
+def test_reads_file_with_spaces(repo):
+    assert git_service.get_file_from_commit(repo, "HEAD", "sub/Main Board.kicad_sch") == "(kicad_sch)\n"
+
+
+@pytest.mark.parametrize("path", ["sub/Old Board.kicad_sch", "sub/Old Main Board.kicad_sch", "nope"])
+def test_missing_file_is_404(repo, path):
+    with pytest.raises(HTTPException) as excinfo:
+        git_service.get_file_from_commit(repo, "HEAD", path)
+    assert excinfo.value.status_code == 404
+
+
+def test_reclone_in_place_after_invalidate(repo, tmp_path):
+    assert git_service.file_exists_in_commit(repo, "HEAD", "sub/Main Board.kicad_sch")
+    git_service.get_file_from_commit(repo, "HEAD", "sub/Main Board.kicad_sch")
+
+    # Delete and re-create the repository at the same path, as re-importing does
+    shutil.rmtree(repo)
+    _make_repo(tmp_path / "repo", {"Other.kicad_pcb": "(kicad_pcb)\n"})
+    git_service.invalidate_repo(repo)
+
+    assert git_service.get_file_from_commit(repo, "HEAD", "Other.kicad_pcb") == "(kicad_pcb)\n"
+    assert git_service.file_exists_in_commit(repo, "HEAD", "Other.kicad_pcb")
+
+
+@pytest.mark.parametrize("path, exists", [
+    ("sub/Main Board.kicad_sch", True),
+    ("sub", True),
+    ("sub/Old Board.kicad_sch", False),
+    ("sub/Old Main Board.kicad_sch", False),
+    ("nope", False),
+])
+def test_file_exists_in_commit(repo, path, exists):
+    assert git_service.file_exists_in_commit(repo, "HEAD", path) is exists
+
+
+def test_closed_cat_file_is_not_restarted(repo):
+    borrowed = git_service.get_cat_file(repo)
+    assert borrowed.read_blob("HEAD:sub/Main Board.kicad_sch") == b"(kicad_sch)\n"
+
+    # Evicted or invalidated while another thread still holds it
+    git_service.invalidate_repo(repo)
+    with pytest.raises(git_service.CatFileClosedError):
+        borrowed.read_blob("HEAD:sub/Main Board.kicad_sch")
+    assert borrowed._proc is None
+
+    assert git_service.get_file_from_commit(repo, "HEAD", "sub/Main Board.kicad_sch") == "(kicad_sch)\n"
@@ -0,0 +1,26 @@
+import subprocess
+
+from app.services import git_service
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                   check=True, capture_output=True)
+
+
+def test_releases_see_new_tag_in_existing_namespace(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "board.kicad_pcb").write_text("(kicad_pcb)\n")
+    _git(repo, "init", "-q")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "init")
+    _git(repo, "tag", "release/v1")
+    try:
+        assert [r["tag"] for r in git_service.get_releases(str(repo))] == ["release/v1"]
+
+        # Only refs/tags/release changes, not refs/tags itself
+        _git(repo, "tag", "release/v2")
+        assert sorted(r["tag"] for r in git_service.get_releases(str(repo))) == ["release/v1", "release/v2"]
+    finally:
+        git_service.invalidate_repo(str(repo))